@@ -0,0 +1,364 @@
+"""Throughput benchmarks for ucol.
+
+Times the linesplitter branches, the column selectors, split_json,
+remove_comma and the output modes on deterministic synthetic data, and
+reports rows/sec and MB/sec for each. Results can be saved as JSON and
+compared with an earlier run to flag regressions:
+
+    python -m benchmarks.ucol_bench --save before.json
+    (change something)
+    python -m benchmarks.ucol_bench --compare before.json
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import platform
+import random
+import sys
+import time
+import typing
+from unittest import mock
+
+from utool import ucol
+
+SEED = 1234
+MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT")
+WORDS = ("alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta")
+
+
+def money(rng: random.Random) -> str:
+    """Return a dollar amount with thousands separators."""
+    return f"{'-' if rng.random() < 0.3 else ''}${rng.uniform(0, 100000):,.2f}"
+
+
+def narrow_lines(count: int, delimiter: str = " ") -> list[str]:
+    """Return count lines of four columns, like the README's data."""
+    rng = random.Random(SEED)
+    return [
+        delimiter.join(
+            (str(rng.randrange(2000, 2025)), rng.choice(MONTHS), money(rng), money(rng))
+        )
+        for _ in range(count)
+    ]
+
+
+def wide_lines(count: int, columns: int = 50, delimiter: str = " ") -> list[str]:
+    """Return count lines of columns short columns."""
+    rng = random.Random(SEED)
+    return [
+        delimiter.join(rng.choice(WORDS) for _ in range(columns)) for _ in range(count)
+    ]
+
+
+def null_lines(count: int, delimiter: str = ",") -> list[str]:
+    """Return count lines with runs of delimiters (null columns)."""
+    rng = random.Random(SEED)
+    choices = (*WORDS, "", "")
+    return [delimiter.join(rng.choice(choices) for _ in range(8)) for _ in range(count)]
+
+
+def csv_lines(count: int, delimiter: str = ",") -> list[str]:
+    """Return count csv lines, some fields quoted and holding delimiters."""
+    rng = random.Random(SEED)
+    lines = []
+    for _ in range(count):
+        fields = [rng.choice(WORDS), money(rng), f'"{rng.choice(WORDS)} ""q"""']
+        fields.append(f'"{rng.choice(WORDS)}{delimiter} {rng.choice(WORDS)}"')
+        fields.append(str(rng.randrange(1000)))
+        lines.append(delimiter.join(fields))
+    return lines
+
+
+def json_text(count: int) -> str:
+    """Return count nested JSON records, one per line."""
+    rng = random.Random(SEED)
+    return "\n".join(
+        json.dumps(
+            {
+                "id": i,
+                "ts": f"2024-{rng.randrange(1, 13):02}-{rng.randrange(1, 29):02}",
+                "req": {
+                    "method": rng.choice(("GET", "PUT", "POST")),
+                    "status": rng.choice((200, 404, 500, None)),
+                    "headers": {"host": rng.choice(WORDS), "agent": "bench"},
+                },
+                "items": [
+                    {"sku": f"{rng.choice(WORDS)}-{n}", "qty": rng.randrange(9)}
+                    for n in range(rng.randrange(1, 4))
+                ],
+                **{f"k{n}": rng.choice(WORDS) for n in range(20)},
+            }
+        )
+        for i in range(count)
+    )
+
+
+def size(data: typing.Iterable[str]) -> int:
+    """Return the number of bytes in lines of data (with newlines)."""
+    return sum(len(line.encode()) + 1 for line in data)
+
+
+def bench_splitter(
+    lines: list[str] | list[bytes], **options
+) -> typing.Callable[[], int]:
+    """Return a function that splits every line with a linesplitter."""
+    options = {
+        "is_csv": False,
+        "is_tsv": False,
+        "nullable": False,
+        "strip": True,
+        **options,
+    }
+    splitter = ucol.linesplitter(**options)
+
+    def run():
+        for line in lines:
+            splitter(line)
+        return len(lines)
+
+    return run
+
+
+def bench_split(lines: list[str], specs: str, **options) -> typing.Callable[[], int]:
+    """Return a function that runs split with column specs."""
+    indexes = [ucol.column_specifier(spec) for spec in specs.split()]
+
+    def run():
+        for _ in ucol.split(lines, indexes, **options):
+            pass
+        return len(lines)
+
+    return run
+
+
+def bench_json(text: str, specs: str) -> typing.Callable[[], int]:
+    """Return a function that runs split_json with column specs."""
+    indexes = [ucol.column_specifier(spec) for spec in specs.split()]
+
+    def run():
+        return sum(1 for _ in ucol.split_json(text, indexes)) - 1
+
+    return run
+
+
+def bench_remove_comma(lines: list[str]) -> typing.Callable[[], int]:
+    """Return a function that runs remove_comma on every column."""
+    columns = [column for line in lines for column in line.split()]
+
+    def run():
+        for column in columns:
+            ucol.remove_comma(column)
+        return len(lines)
+
+    return run
+
+
+def bench_main(lines: list[str], *options: str) -> typing.Callable[[], int]:
+    """Return a function that runs ucol's main with options on lines."""
+    text = "\n".join(lines) + "\n"
+
+    def run():
+        stdout = io.StringIO()
+        with (
+            mock.patch.object(sys, "argv", ["ucol", *options]),
+            mock.patch.object(sys, "stdin", io.StringIO(text)),
+            contextlib.redirect_stdout(stdout),
+        ):
+            ucol.main()
+        return len(lines)
+
+    return run
+
+
+def benchmarks(rows: int) -> dict[str, tuple[typing.Callable[[], int], int]]:
+    """Return {name: (function, input bytes)} for every benchmark.
+
+    Each function processes its input once and returns the number of input
+    rows.
+    """
+    narrow = narrow_lines(rows)
+    wide = wide_lines(rows)
+    nulls = null_lines(rows)
+    commas = wide_lines(rows, 10, ",")
+    multi = null_lines(rows, ",;")
+    tabs = csv_lines(rows, "\t")
+    csvs = csv_lines(rows)
+    text = json_text(rows)
+    binary = [line.encode() for line in narrow]
+    sizes = {
+        id(data): size(data)
+        for data in (narrow, wide, commas, nulls, multi, tabs, csvs)
+    }
+    sizes[id(binary)] = sizes[id(narrow)]
+
+    def entry(function, data):
+        return function, sizes[id(data)]
+
+    return {
+        # linesplitter branches
+        "split/whitespace": entry(bench_splitter(narrow, delimiter=None), narrow),
+        "split/whitespace-no-strip": entry(
+            bench_splitter(narrow, delimiter=None, strip=False), narrow
+        ),
+        "split/whitespace-nullable": entry(
+            bench_splitter(narrow, delimiter=None, nullable=True), narrow
+        ),
+        "split/whitespace-wide": entry(bench_splitter(wide, delimiter=None), wide),
+        "split/whitespace-maxsplit": entry(
+            bench_splitter(wide, delimiter=None, maxsplit=2), wide
+        ),
+        "split/char": entry(bench_splitter(commas, delimiter=","), commas),
+        "split/char-repeated": entry(bench_splitter(nulls, delimiter=","), nulls),
+        "split/char-nullable": entry(
+            bench_splitter(nulls, delimiter=",", nullable=True), nulls
+        ),
+        "split/chars": entry(bench_splitter(multi, delimiter=",;"), multi),
+        "split/chars-nullable": entry(
+            bench_splitter(multi, delimiter=",;", nullable=True), multi
+        ),
+        "split/csv": entry(bench_splitter(csvs, delimiter=None, is_csv=True), csvs),
+        "split/tsv": entry(bench_splitter(tabs, delimiter=None, is_tsv=True), tabs),
+        "split/binary": entry(
+            bench_splitter(binary, delimiter=None, binary=True), binary
+        ),
+        # column selectors, through split
+        "select/column": entry(bench_split(wide, "1 5 -1"), wide),
+        "select/range": entry(bench_split(wide, "40+"), wide),
+        "select/group": entry(bench_split(wide, "2-6"), wide),
+        "select/slice": entry(bench_split(wide, "3[2,4] _1[,3]"), wide),
+        "select/fixed-width": entry(bench_split(narrow, "2", widths="auto"), narrow),
+        "select/where": entry(
+            bench_split(narrow, "1 3", where=[ucol.where_specifier("2==AUG")]), narrow
+        ),
+        "select/csv-records": entry(bench_split(csvs, "1 4", is_csv=True), csvs),
+        "select/csv-unquoted": entry(bench_split(commas, "1 4", is_csv=True), commas),
+        # JSON
+        "json/keys": (bench_json(text, "1 2"), len(text.encode())),
+        "json/all-keys": (bench_json(text, "1+"), len(text.encode())),
+        "json/paths": (
+            bench_json(text, "req.status req.headers.host items[0].sku"),
+            len(text.encode()),
+        ),
+        # number cleanup
+        "remove_comma": entry(bench_remove_comma(narrow), narrow),
+        # output modes, through main
+        "output/text": entry(bench_main(narrow, "1", "3"), narrow),
+        "output/to-json": entry(bench_main(narrow, "--to-json", "1", "3"), narrow),
+        "output/to-ndjson": entry(bench_main(narrow, "--to-ndjson", "1", "3"), narrow),
+        "output/to-csv": entry(bench_main(narrow, "1", "3", "--to-csv"), narrow),
+        "output/to-tsv": entry(bench_main(narrow, "1", "3", "--to-tsv"), narrow),
+        "output/to-sc": entry(bench_main(narrow, "--to-sc", "1", "3", "4"), narrow),
+    }
+
+
+def run(rows: int, repeat: int, pattern: str) -> dict[str, dict[str, float]]:
+    """Run the benchmarks whose names match pattern and return their results.
+
+    Each benchmark is run once to warm up, then repeat times, and its fastest
+    run is kept.
+    """
+    results = {}
+    for name, (function, nbytes) in benchmarks(rows).items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        function()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {
+            "seconds": best,
+            "rows_per_sec": count / best,
+            "mb_per_sec": nbytes / best / 1e6,
+        }
+        print(
+            f"{name:28} {count / best:12,.0f} rows/s {nbytes / best / 1e6:8.1f} MB/s",
+            flush=True,
+        )
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """Print each benchmark's change from baseline; return the regressions.
+
+    A benchmark regressed if its rows/sec fell by more than threshold (a
+    fraction of the baseline's).
+    """
+    regressions = []
+    print()
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["rows_per_sec"]
+        change = result["rows_per_sec"] / before - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:28} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    """Main handler."""
+    parser = argparse.ArgumentParser(description="benchmark ucol throughput")
+    parser.add_argument(
+        "--rows", type=int, default=20000, help="input rows per benchmark"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs per benchmark; the best is kept"
+    )
+    parser.add_argument(
+        "--filter",
+        default="*",
+        metavar="PATTERN",
+        help="only run benchmarks whose names match PATTERN, e.g. 'split/*'",
+    )
+    parser.add_argument("--save", metavar="FILE", help="save the results as JSON")
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="compare with results saved by --save; exit 1 on a regression",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="slowdown (fraction of the saved rows/sec) that counts as a "
+        "regression (default=0.10)",
+    )
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat, args.filter)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "rows": args.rows,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("rows") != args.rows:
+            print(f"note: {args.compare} was run with --rows {baseline.get('rows')}")
+        if compare(results, baseline["results"], args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""tests for inputs"""
+
+import argparse
+import bz2
+import gzip
+import io
+import lzma
+import sys
+
+import pytest
+
+from utool import inputs, ucol, usum
+
+DATA = "".join(f"line {i}\n" for i in range(10000))
+
+
+@pytest.mark.parametrize(
+    "compress",
+    (
+        lambda data: data,
+        gzip.compress,
+        bz2.compress,
+        lzma.compress,
+    ),
+)
+def test_input_file(tmp_path, compress):
+    """test plain and compressed files read the same"""
+    path = tmp_path / "data"
+    path.write_bytes(compress(DATA.encode()))
+    with inputs.input_file(str(path)) as file:
+        assert file.name == str(path)
+        assert file.read() == DATA
+
+
+def test_input_file_stdin():
+    """test - is stdin"""
+    assert inputs.input_file("-") is sys.stdin
+
+
+def test_input_file_missing(tmp_path):
+    """test a missing file is an argparse error"""
+    with pytest.raises(argparse.ArgumentTypeError):
+        inputs.input_file(str(tmp_path / "missing"))
+
+
+def test_input_file_not_regular(tmp_path):
+    """test a compressed file is not treated as a regular file"""
+    path = tmp_path / "data.gz"
+    path.write_bytes(gzip.compress(DATA.encode()))
+    with inputs.input_file(str(path)) as file:
+        assert not ucol._regular_file(file)
+
+
+def test_input_file_corrupt(tmp_path):
+    """test a decompression error is raised by the reader"""
+    path = tmp_path / "data.gz"
+    path.write_bytes(gzip.compress(DATA.encode())[:100])
+    with inputs.input_file(str(path)) as file, pytest.raises(EOFError):
+        file.read()
+
+
+def test_read_ahead_close():
+    """test closing before the end stops the thread"""
+    source = io.BytesIO(DATA.encode())
+    reader = inputs.ReadAhead(source, "data", size=16, depth=2)
+    assert reader.read(4) == b"line"
+    reader.close()
+    assert not reader._thread.is_alive()
+    assert source.closed
+
+
+def test_ucol_compressed(tmp_path, capsys):
+    """test ucol reading a compressed file"""
+    path = tmp_path / "data.xz"
+    path.write_bytes(lzma.compress(b"a 1\nb 2\n"))
+    sys.argv = ["ucol", "2", "-f", str(path)]
+    ucol.main()
+    assert capsys.readouterr().out == "1\n2\n"
+
+
+def test_usum_compressed(tmp_path, capsys):
+    """test usum reading a compressed file"""
+    path = tmp_path / "data.bz2"
+    path.write_bytes(bz2.compress(b"a 1\nb 2\na 3\n"))
+    sys.argv = ["usum", "1", "-f", str(path)]
+    usum.main()
+    assert capsys.readouterr().out == "a 4\nb 2\n"
+
+
+@pytest.mark.parametrize("binary", (False, True))
+def test_open_files(tmp_path, binary):
+    """test streaming (compressed) files, each closed when the next is read"""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"data{i}.gz"
+        path.write_bytes(gzip.compress(f"a{i}\r\nb{i}\n".encode()))
+        paths.append(str(path))
+    files = []
+    lines = []
+    for file in inputs.open_files(paths, binary):
+        assert all(previous.closed for previous in files)
+        files.append(file)
+        lines.extend(file)
+    assert all(file.closed for file in files)
+    if binary:
+        assert lines == [
+            line for i in range(3) for line in (b"a%d\r\n" % i, b"b%d\n" % i)
+        ]
+    else:
+        assert lines == [f"{c}{i}\n" for i in range(3) for c in "ab"]
+
+
+def test_open_files_close(tmp_path, monkeypatch):
+    """test files opened ahead are closed when the generator is closed"""
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"data{i}"
+        path.write_text(DATA)
+        paths.append(str(path))
+    opened = []
+    open_ahead = inputs._open_ahead
+
+    def record(path, binary):
+        opened.append(open_ahead(path, binary))
+        return opened[-1]
+
+    monkeypatch.setattr(inputs, "_open_ahead", record)
+    files = inputs.open_files(paths)
+    next(files)
+    files.close()
+    assert 1 < len(opened) < 5
+    assert all(file.closed for file in opened)
+
+
+@pytest.mark.parametrize("ordered", (True, False))
+def test_prefetch(ordered):
+    """test results for every path, in order if ordered"""
+    paths = [str(i) for i in range(20)]
+    result = list(inputs.prefetch(paths, int, ordered, workers=3))
+    if ordered:
+        assert result == list(range(20))
+    else:
+        assert sorted(result) == list(range(20))
+
+
+def test_prefetch_close():
+    """test closing the generator early"""
+    loaded = []
+    files = inputs.prefetch(map(str, range(100)), loaded.append, workers=2)
+    next(files)
+    files.close()
+    assert len(loaded) < 100
+
+
+@pytest.mark.parametrize(
+    "paths, result, columns",
+    (
+        (["a"], ["a"], []),
+        (["a", "3", "7"], ["a"], [3, 7]),
+        (["a", "b", "x"], ["a", "b", "x"], []),
+        (["3", "7"], ["3"], [7]),
+        (["a", "3", "b", "7"], ["a", "3", "b"], [7]),
+    ),
+)
+def test_trailing_columns(tmp_path, monkeypatch, paths, result, columns):
+    """test column arguments that follow the file names"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a").write_text("")
+    (tmp_path / "b").write_text("")
+    assert inputs.trailing_columns(paths, int) == (result, columns)
+
+
+def test_trailing_columns_separator():
+    """test a value with a directory separator is always a file name"""
+    assert inputs.trailing_columns(["a", "b/c", "d"], str) == (["a", "b/c"], ["d"])
+
+
+@pytest.mark.parametrize("unordered", ((), ("--unordered",)))
+def test_ucol_files(tmp_path, capsys, unordered):
+    """test ucol reading several files as one input"""
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"data{i}"
+        path.write_bytes(gzip.compress(f"a{i} {i}\nb{i} {i}\n".encode()))
+        paths.append(str(path))
+    sys.argv = ["ucol", *unordered, "-f", *paths, "2", "1"]
+    ucol.main()
+    lines = capsys.readouterr().out.splitlines()
+    expected = [f"{i} {c}{i}" for i in range(5) for c in "ab"]
+    assert (lines if not unordered else sorted(lines)) == expected
+
+
+def test_ucol_files_json(tmp_path, capsys):
+    """test a header row from the first JSON file only"""
+    for i in range(2):
+        (tmp_path / f"data{i}").write_text(f'[{{"a": {i}, "b": 2}}]')
+    sys.argv = ["ucol", "--json", "-f", *sorted(map(str, tmp_path.iterdir())), "1"]
+    ucol.main()
+    assert capsys.readouterr().out == "a\n0\n1\n"
+
+
+def test_ucol_files_json_key_order(tmp_path, capsys):
+    """test a column selects the same key in files with other key orders"""
+    (tmp_path / "j1.json").write_text('{"a": 1, "b": 2}')
+    (tmp_path / "j2.json").write_text('{"b": 3, "a": 4, "c": 5}')
+    sys.argv = ["ucol", "--json", "-f", *sorted(map(str, tmp_path.iterdir())), "1"]
+    ucol.main()
+    assert capsys.readouterr().out == "a\n1\n4\n"
+
+
+def test_ucol_files_missing(tmp_path):
+    """test a missing file is a usage error"""
+    (tmp_path / "a").write_text("")
+    sys.argv = ["ucol", "-f", str(tmp_path / "a"), str(tmp_path / "b")]
+    with pytest.raises(SystemExit):
+        ucol.main()
+
+
+def test_ucol_files_json_missing(tmp_path):
+    """test a missing file after -f is not taken for a JSON path column"""
+    (tmp_path / "a.json").write_text('{"a": 1}')
+    sys.argv = ["ucol", "--json", "1", "-f", str(tmp_path / "a.json"), "missing.json"]
+    with pytest.raises(SystemExit):
+        ucol.main()
+
+
+def test_usum_files(tmp_path, capsys):
+    """test usum reading several files as one input"""
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"data{i}"
+        path.write_text("a 1\nb 2\n")
+        paths.append(str(path))
+    sys.argv = ["usum", "-f", *paths, "1"]
+    usum.main()
+    assert capsys.readouterr().out == "a 3\nb 6\n"
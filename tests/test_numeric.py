@@ -0,0 +1,55 @@
+"""tests for numeric"""
+
+import re
+
+import pytest
+
+from utool import numeric
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        "",
+        "abc",
+        "123",
+        "12,345",
+        "12,34",
+        "12,345.678",
+        "$12,345.678",
+        "$12,345,000.678",
+        "$12",
+        "$12.34",
+        "$a",
+        "-$12,345.67",
+        "-$12",
+        "-12,345",
+        "1,000\n",
+        "a,b",
+        "$",
+        "-",
+        "1,000,00",
+    ),
+)
+def test_un_comma(value):
+    """test un_comma matches the plain regex check"""
+    expected = value
+    if re.match(r"-?(\$\d*|\$?\d{1,3}(,\d{3})+)(\.\d+)?$", value):
+        expected = value.replace("$", "").replace(",", "")
+    assert numeric.un_comma(value) == expected
+
+
+@pytest.mark.parametrize(
+    "columns, result",
+    (
+        (None, ["1000", "a,b", "5"]),
+        ([1], ["1000", "a,b", "$5"]),
+        ([3, 2], ["1,000", "a,b", "5"]),
+        ([4], ["1,000", "a,b", "$5"]),
+    ),
+)
+def test_un_commaer(columns, result):
+    """test normalizing selected columns"""
+    row = ["1,000", "a,b", "$5"]
+    assert numeric.un_commaer(columns)(row) == result
+    assert row == ["1,000", "a,b", "$5"]
@@ -1,6 +1,12 @@
 """test ucol"""
 
+import argparse
+import collections
+import csv
 import io
+import json
+import random
+import re
 import sys
 from unittest import mock
 
@@ -8,7 +14,6 @@ import pytest
 
 from utool import ucol
 
-
 DATA = "1 2 3\n" + "4 5 6\n" + "A B C"
 
 DATA_1 = [["1"], ["4"], ["A"]]
@@ -69,6 +74,136 @@ def test_basic(data, cols, delim, nullable, strip, result):
     assert ans == result
 
 
+def test_file_input():
+    """test split reading from an open file"""
+    cols = [ucol.column_specifier(col) for col in ["3", "2", "1"]]
+    ans = list(ucol.split(io.StringIO(DATA + "\n"), cols))
+    assert ans == DATA_321
+
+
+def test_streaming_input():
+    """test that rows are produced before the input is exhausted"""
+
+    def lines():
+        yield "1 2 3\n"
+        yield "4 5 6\n"
+        raise AssertionError("read past second line")
+
+    cols = [ucol.column_specifier("2")]
+    rows = ucol.split(lines(), cols)
+    assert next(rows) == ["2"]
+    assert next(rows) == ["5"]
+
+
+def regex_split(line, delimiter, nullable, strip):
+    """reference splitter: the original regex implementation"""
+    if delimiter is None:
+        pattern = r"\s" if nullable else r"\s+"
+        if strip:
+            line = line.strip()
+    else:
+        pattern = "[" + (r"\^" if delimiter == "^" else delimiter) + "]"
+        if not nullable:
+            pattern += "+"
+        if strip:
+            line = line.strip(delimiter)
+    return re.split(pattern, line)
+
+
+PARITY_LINES = (
+    "",
+    " ",
+    "   ",
+    "a",
+    "a b c",
+    " a b c",
+    "a b c ",
+    "  a  b\t\tc  ",
+    "a\tb\x0bc\x0cd\x1ce\x85f\u2028g\u3000h",
+    "|",
+    "||",
+    "a|b|c",
+    "|a|b|c|",
+    "a||b|||c",
+    "||a||b||",
+    "^^1^2^^3^",
+    "a,b|c,,d||e",
+    ",|a|,",
+    "x y|z,w^v",
+    "a\u00c3b\u00e9c",
+    "\u00e9\u00e9a\u00e9b\u00e9|c\u00e9",
+)
+
+
+@pytest.mark.parametrize("delimiter", (None, " ", "|", "^", ",", "\t", "|,"))
+@pytest.mark.parametrize("nullable", (False, True))
+@pytest.mark.parametrize("strip", (False, True))
+def test_splitter_parity(delimiter, nullable, strip):
+    """test splitter matches the regex implementation for every option"""
+    splitter = ucol.linesplitter(False, False, delimiter, nullable, strip)
+    for line in PARITY_LINES:
+        assert splitter(line) == regex_split(line, delimiter, nullable, strip), line
+
+
+@pytest.mark.parametrize("delimiter", (None, " ", "|", "^", ",", "\t", "|,"))
+@pytest.mark.parametrize("nullable", (False, True))
+@pytest.mark.parametrize("strip", (False, True))
+@pytest.mark.parametrize("maxsplit", (1, 2, 3))
+def test_splitter_maxsplit(delimiter, nullable, strip, maxsplit):
+    """test bounded splitter keeps the leading columns of a full split"""
+    splitter = ucol.linesplitter(False, False, delimiter, nullable, strip, maxsplit)
+    for line in PARITY_LINES:
+        full = regex_split(line, delimiter, nullable, strip)
+        cols = splitter(line)
+        assert cols[:maxsplit] == full[:maxsplit], line
+        assert (len(cols) >= maxsplit) == (len(full) >= maxsplit), line
+
+
+@pytest.mark.parametrize(
+    "cols, result",
+    (
+        (["1"], 1),
+        (["3", "1"], 3),
+        (["2[1,3]", "1"], 2),
+        (["1", "-1"], -1),
+        (["_2[1,3]"], -1),
+        (["1", "2+"], -1),
+        (["1-2"], -1),
+    ),
+)
+def test_split_limit(cols, result):
+    """test maxsplit derived from column selectors"""
+    assert ucol.split_limit([ucol.column_specifier(col) for col in cols]) == result
+
+
+def test_bounded_split():
+    """test narrow selection from wide lines"""
+    data = (" ".join(f"{row}.{col}" for col in range(200)) for row in range(3))
+    cols = [ucol.column_specifier(col) for col in ["3", "1"]]
+    ans = list(ucol.split(data, cols))
+    assert ans == [["0.2", "0.0"], ["1.2", "1.0"], ["2.2", "2.0"]]
+
+
+@pytest.mark.parametrize(
+    "cols, row, result",
+    (
+        (["2"], ["a", "b", "c"], ["b"]),
+        (["2", "1", "3"], ["a", "b", "c"], ["b", "a", "c"]),
+        (["-1", "1"], ["a", "b", "c"], ["c", "a"]),
+        (["4"], ["a", "b", "c"], None),
+        (["_4"], ["a", "b", "c"], None),
+        (["1", "4+"], ["a", "b", "c"], ["a"]),
+        (["2-3", "1[1,1]"], ["a", "b", "cc"], ["b cc", "a"]),
+        (["1", "3[2]"], ["a", "b"], None),
+        ([], ["a"], []),
+    ),
+)
+def test_projector(cols, row, result):
+    """test compiled row projection"""
+    project = ucol.projector([ucol.column_specifier(col) for col in cols])
+    assert project(row) == result
+
+
 DATA_DATE = "2025-01-02 A\n2026-03-04 B"
 
 
@@ -132,6 +267,132 @@ def test_group_with_delimiter():
     assert ans == [["A|B", "C", "D|E"]]
 
 
+DATA_FIXED = (
+    "NAME      CITY     AMOUNT\n"
+    "Alexandra Boston     1,200\n"
+    "Bob       Reno         35\n"
+    "Cy        San Jose\n"
+)
+
+
+@pytest.mark.parametrize(
+    "widths, cols, result",
+    (
+        (
+            "10,9,9",
+            ["1", "3"],
+            [["NAME", "AMOUNT"], ["Alexandra", "1,200"], ["Bob", "35"], ["Cy", ""]],
+        ),
+        ("10,9", ["2"], [["CITY"], ["Boston"], ["Reno"], ["San Jose"]]),
+        ("4", ["1"], [["NAME"], ["Alex"], ["Bob"], ["Cy"]]),
+        (
+            "auto",
+            ["2-3"],
+            [["CITY AMOUNT"], ["Boston 1,200"], ["Reno 35"], ["San Jose "]],
+        ),
+    ),
+)
+def test_widths(widths, cols, result):
+    """test fixed-width columns"""
+    cols = [ucol.column_specifier(col) for col in cols]
+    widths = ucol.width_specifier(widths)
+    assert list(ucol.split(io.StringIO(DATA_FIXED), cols, widths=widths)) == result
+
+
+@pytest.mark.parametrize(
+    "lines, result",
+    (
+        ([], [(0, None)]),
+        (["a b", " c  d"], [(0, 4), (4, None)]),
+        (["a  b", "c  d"], [(0, 3), (3, None)]),
+        (["  ab  cd"], [(0, 6), (6, None)]),
+        (["ab cd", "abXcd"], [(0, None)]),
+    ),
+)
+def test_infer_widths(lines, result):
+    """test fixed-width column inference"""
+    assert ucol.infer_widths(lines) == result
+
+
+@pytest.mark.parametrize("spec", ("", "a", "3,0", "3,-1"))
+def test_width_specifier_invalid(spec):
+    """test invalid widths"""
+    with pytest.raises(argparse.ArgumentTypeError):
+        ucol.width_specifier(spec)
+
+
+def test_widths_main(capsys):
+    """test --widths via main()"""
+    sys.argv = ["ucol", "--widths", "auto", "--to-csv", "--", "3", "1"]
+    with mock.patch("sys.stdin", io.StringIO(DATA_FIXED)):
+        ucol.main()
+    out = capsys.readouterr().out
+    assert out == 'AMOUNT,NAME\n"1,200",Alexandra\n35,Bob\n,Cy\n'
+
+
+DATA_WHERE = "GET /a 200 15\nPOST /b 500 7\nGET /c 404 120\nPUT /d - 9\nshort"
+
+
+@pytest.mark.parametrize(
+    "filters, result",
+    (
+        (["1==GET"], ["/a", "/c"]),
+        (["1=GET"], ["/a", "/c"]),
+        (["1!=GET"], ["/b", "/d"]),
+        (["4>10"], ["/a", "/c"]),
+        (["4 <= 9"], ["/b", "/d"]),
+        (["3>=404"], ["/b", "/c"]),
+        (["3==200.0"], ["/a"]),
+        (["3!=200"], ["/b", "/c", "/d"]),
+        (["3<1000"], ["/a", "/b", "/c"]),
+        (["2~^/[ab]"], ["/a", "/b"]),
+        (["2!~^/[ab]"], ["/c", "/d"]),
+        (["1 in PUT,POST"], ["/b", "/d"]),
+        (["1 not in PUT,POST"], ["/a", "/c"]),
+        (["_1<10"], ["/b", "/d"]),
+        (["1==GET", "4>100"], ["/c"]),
+        (["1>PA"], ["/b", "/d"]),
+    ),
+)
+def test_where(filters, result):
+    """test row filters"""
+    where = [ucol.where_specifier(spec) for spec in filters]
+    cols = [ucol.column_specifier("2")]
+    ans = list(ucol.split(DATA_WHERE, cols, where=where))
+    assert ans == [[col] for col in result]
+
+
+def test_where_before_projection():
+    """test filtered rows are not checked for enough columns"""
+    where = [ucol.where_specifier("1==GET")]
+    cols = [ucol.column_specifier("4")]
+    ans = list(ucol.split(DATA_WHERE, cols, strict=True, where=where))
+    assert ans == [["15"], ["120"]]
+
+
+def test_where_bounded_split():
+    """test filter columns are included when bounding the split"""
+    where = [ucol.where_specifier("4>10")]
+    cols = [ucol.column_specifier("1")]
+    ans = list(ucol.split(DATA_WHERE, cols, where=where))
+    assert ans == [["GET"], ["GET"]]
+
+
+@pytest.mark.parametrize("spec", ("", "x==1", "1", "1 2", "1~["))
+def test_where_specifier_invalid(spec):
+    """test invalid filters"""
+    with pytest.raises(argparse.ArgumentTypeError):
+        ucol.where_specifier(spec)
+
+
+def test_where_main(capsys):
+    """test --where via main()"""
+    sys.argv = ["ucol", "--where", "1==GET", "--where", "3<300", "2", "4"]
+    with mock.patch("sys.stdin", io.StringIO(DATA_WHERE)):
+        ucol.main()
+    assert capsys.readouterr().out == "/a 15\n"
+
+
 DATA_CSV = '"1"," 2",3\n' + '"4",5,6\n' + '"A","""B",C'
 
 DATA_CSV_1 = [["1"], ["4"], ["A"]]
@@ -156,6 +417,67 @@ def test_csv(data, cols, result):
     assert ans == result
 
 
+def test_csv_multiline():
+    """test csv quoted fields that contain newlines"""
+    data = io.StringIO('1,"two\nlines",3\n4,5,6\n')
+    cols = [ucol.column_specifier(col) for col in ["2", "3"]]
+    ans = list(ucol.split(data, cols, is_csv=True))
+    assert ans == [["two\nlines", "3"], ["5", "6"]]
+
+
+def test_csv_strict_line_number():
+    """test csv strict error reports the input line number"""
+    data = io.StringIO('1,"a\nb",3\n4\n')
+    cols = [ucol.column_specifier("3")]
+    with pytest.raises(ucol.UcolException, match="line=3:"):
+        list(ucol.split(data, cols, strict=True, is_csv=True))
+
+
+def csv_reader_records(lines, is_tsv, first_lineno):
+    """Reference for _csv_records: every line through one csv reader."""
+    reader = csv.reader(lines, dialect="excel-tab" if is_tsv else "excel")
+    delimiter = "\t" if is_tsv else ","
+    for cols in reader:
+        yield reader.line_num + first_lineno - 1, delimiter.join(cols), cols
+
+
+CSV_PARITY_LINES = (
+    "a,b,c\n",
+    "\n",
+    "",
+    ",\n",
+    " a , b \n",
+    "a,,\n",
+    'a,"b,c",d\n',
+    '"multi\n',
+    'line",x\n',
+    'a,b"c,d\n',
+    '"""q""",z\n',
+    "a\tb\tc\n",
+    '"t\tab"\tx\n',
+    "a,b\r\n",
+    "a,\x00,b\n",
+    "last,no,newline",
+)
+
+
+@pytest.mark.parametrize("is_tsv", (False, True))
+@pytest.mark.parametrize("first_lineno", (1, 7))
+def test_csv_records_parity(is_tsv, first_lineno):
+    """test the quote-free fast path matches a csv reader on every line"""
+    for start in range(len(CSV_PARITY_LINES)):
+        lines = CSV_PARITY_LINES[start:] + CSV_PARITY_LINES[:start]
+        expected = list(csv_reader_records(lines, is_tsv, first_lineno))
+        assert list(ucol._csv_records(lines, is_tsv, first_lineno)) == expected
+
+
+def test_csv_records_unterminated_quote():
+    """test a quote left open at the end of the input"""
+    lines = ["a,b\n", '"open,c\n', "d,e\n"]
+    expected = list(csv_reader_records(lines, False, 1))
+    assert list(ucol._csv_records(lines, False, 1)) == expected
+
+
 DATA_TSV = '"1"\t" 2"\t3\n' + '"4"\t5\t6\n' + '"A"\t"""B"\tC'
 
 
@@ -174,6 +496,133 @@ def test_tsv(data, cols, result):
     assert ans == result
 
 
+DATA_PARALLEL = "".join(f"{n} {n * 2} row{n}\n" for n in range(200))
+
+
+@pytest.mark.parametrize("chunk_size", (1, 10, 100, 100000))
+def test_split_parallel(tmp_path, chunk_size):
+    """test parallel split matches split"""
+    path = tmp_path / "data"
+    path.write_text(DATA_PARALLEL)
+    cols = [ucol.column_specifier(col) for col in ["3", "1"]]
+    ans = ucol.split_parallel(str(path), cols, jobs=2, chunk_size=chunk_size)
+    assert list(ans) == list(ucol.split(DATA_PARALLEL, cols))
+
+
+def test_split_parallel_strict(tmp_path):
+    """test parallel split reports the line number of a short row"""
+    path = tmp_path / "data"
+    path.write_text(DATA_PARALLEL + "short\n" + DATA_PARALLEL)
+    cols = [ucol.column_specifier("2")]
+    rows = ucol.split_parallel(str(path), cols, strict=True, jobs=2, chunk_size=50)
+    with pytest.raises(ucol.UcolException, match="line=201:'short'"):
+        list(rows)
+
+
+def test_jobs_main(tmp_path, capsys):
+    """test --jobs via main()"""
+    path = tmp_path / "data"
+    path.write_text(DATA_PARALLEL)
+    sys.argv = ["ucol", "-j", "2", "-f", str(path), "2"]
+    ucol.main()
+    assert capsys.readouterr().out == "".join(f"{n * 2}\n" for n in range(200))
+
+
+def test_jobs_main_stdin(tmp_path, capsys):
+    """test --jobs is ignored for stdin redirected from a file"""
+    path = tmp_path / "data"
+    path.write_text(DATA_PARALLEL)
+    sys.argv = ["ucol", "-j", "2", "2"]
+    with open(path, encoding="utf-8") as file, mock.patch("sys.stdin", file):
+        file.buffer.raw.name = "<stdin>"
+        ucol.main()
+    assert capsys.readouterr().out == "".join(f"{n * 2}\n" for n in range(200))
+
+
+@pytest.mark.parametrize("block_size", (1, 5, 1000))
+@pytest.mark.parametrize(
+    "data, result",
+    (
+        ("", []),
+        ("a b\n", ["a b"]),
+        ("a b\nc d", ["a b", "c d"]),
+        ("a\n\nb\n", ["a", "", "b"]),
+        ("a\r\nb\rc\n", ["a", "b", "c"]),
+        ("\u00e9t\u00e9\n\u00fcber\n", ["\u00e9t\u00e9", "\u00fcber"]),
+    ),
+)
+def test_mapped_lines(tmp_path, block_size, data, result):
+    """test lines read through a memory map"""
+    path = tmp_path / "data"
+    path.write_bytes(data.encode("utf-8"))
+    with open(path, encoding="utf-8") as file:
+        assert list(ucol.mapped_lines(file, block_size)) == result
+
+
+def test_mapped_main(tmp_path, capsys):
+    """test -f regular file via main()"""
+    path = tmp_path / "data"
+    path.write_text(DATA)
+    sys.argv = ["ucol", "-f", str(path), "3", "1"]
+    ucol.main()
+    assert capsys.readouterr().out == "3 1\n6 4\nC A\n"
+
+
+def test_redirected_stdin_main(tmp_path, capsys):
+    """test stdin redirected from a file is read from its current offset"""
+    path = tmp_path / "data"
+    path.write_text(DATA)
+    with open(path, encoding="utf-8") as file:
+        file.readline()
+        sys.argv = ["ucol", "3", "1"]
+        with mock.patch("sys.stdin", file):
+            ucol.main()
+    assert capsys.readouterr().out == "6 4\nC A\n"
+
+
+@pytest.mark.parametrize(
+    "delimiter", (None, " ", "|", "^", "|,", "\u00e9", "|\u00e9", "\u00c3\u00a9")
+)
+@pytest.mark.parametrize("nullable", (False, True))
+@pytest.mark.parametrize("strip", (False, True))
+@pytest.mark.parametrize("maxsplit", (-1, 2))
+def test_splitter_binary(delimiter, nullable, strip, maxsplit):
+    """test bytes splitter matches the str splitter on utf-8 lines"""
+    text = ucol.linesplitter(False, False, delimiter, nullable, strip, maxsplit)
+    binary = ucol.linesplitter(
+        False, False, delimiter, nullable, strip, maxsplit, binary=True
+    )
+    for line in PARITY_LINES:
+        # str.split treats some non-ascii characters as whitespace
+        if line.isascii() or delimiter is not None:
+            ans = [col.decode() for col in binary(line.encode())]
+            assert ans == text(line), line
+
+
+def test_split_binary():
+    """test split on undecodable bytes"""
+    data = io.BytesIO(b"a\xff b c\n\xfe\xfd x-y\n")
+    cols = [ucol.column_specifier(col) for col in ["2-3", "1"]]
+    ans = list(ucol.split(data, cols, binary=True))
+    assert ans == [[b"b c", b"a\xff"], [b"x-y", b"\xfe\xfd"]]
+
+
+def test_binary_main(tmp_path, capsysbinary):
+    """test --binary via main() with stdin and a mapped file"""
+    data = b"\xff|1|x\n\xfe|2|y"
+    sys.argv = ["ucol", "--binary", "-d|", "-D:", "3", "1"]
+    stdin = io.TextIOWrapper(io.BytesIO(data))
+    with mock.patch("sys.stdin", stdin):
+        ucol.main()
+    assert capsysbinary.readouterr().out == b"x:\xff\ny:\xfe\n"
+
+    path = tmp_path / "data"
+    path.write_bytes(data)
+    sys.argv = ["ucol", "--binary", "-d|", "-D:", "-f", str(path), "3", "1"]
+    ucol.main()
+    assert capsysbinary.readouterr().out == b"x:\xff\ny:\xfe\n"
+
+
 DATA_SPARSE = "1 2\n3\n4 5"
 
 DATA_SPARSE_2 = [["2"], ["5"]]
@@ -191,6 +640,17 @@ def test_strict():
         list(ucol.split(DATA_SPARSE, cols, strict=True))
 
 
+def test_strict_main_output(capsys):
+    """test rows before a --strict error are output"""
+    sys.argv = ["ucol", "-s", "2"]
+    with (
+        mock.patch("sys.stdin", io.StringIO("1 2\n3 4\n5\n")),
+        pytest.raises(ucol.UcolException),
+    ):
+        ucol.main()
+    assert capsys.readouterr().out == "2\n4\n"
+
+
 @pytest.mark.parametrize(
     "value, result",
     (
@@ -316,6 +776,55 @@ def test_json_input(data, cols, result):
     assert ans == result
 
 
+@pytest.mark.parametrize("data", (JSON_LIST, JSON_SEQUENCE, JSON_PRETTY))
+@pytest.mark.parametrize("chunk_size", (1, 2, 3, 7, 1000))
+def test_json_chunks(data, chunk_size):
+    """Test JSON decoding is independent of read size."""
+    dicts = list(ucol._iter_json_dicts(io.StringIO(data), chunk_size))
+    assert dicts == [{"name": "Alice", "age": "30"}, {"name": "Bob", "age": "25"}]
+
+
+def test_json_scalars_across_chunks():
+    """Test scalar values split across reads are decoded whole."""
+    dicts = ucol._iter_json_dicts(io.StringIO("[12345, 1.5e10]"), 2)
+    assert list(dicts) == [12345, 1.5e10]
+
+
+def test_json_invalid():
+    """Test malformed JSON raises an error."""
+    with pytest.raises(ValueError):
+        list(ucol._iter_json_dicts(io.StringIO('{"a": 1'), 2))
+
+
+def test_json_header_sample():
+    """Test header from the first N records; later keys are ignored."""
+    data = '{"a": 1}\n{"a": 2, "b": 3}\n{"a": 4, "c": 5}'
+    cols = [ucol.column_specifier("1+")]
+    ans = list(ucol.split_json(io.StringIO(data), cols, header_sample=2))
+    assert ans == [["a", "b"], ["1", ""], ["2", "3"], ["4", ""]]
+
+
+def test_json_header_sample_streams():
+    """Test rows are produced before the input is exhausted."""
+
+    def chunks():
+        yield '{"a": 1}\n{"a": 2}\n'
+        raise AssertionError("read past second record")
+
+    rows = ucol.split_json(chunks(), [ucol.column_specifier("1")], header_sample=1)
+    assert next(rows) == ["a"]
+    assert next(rows) == ["1"]
+    assert next(rows) == ["2"]
+
+
+@pytest.mark.parametrize("value", ("0", "-1"))
+def test_json_header_sample_invalid(value):
+    """Test --header-sample below 1 is a usage error."""
+    sys.argv = ["ucol", "--json", f"--header-sample={value}"]
+    with mock.patch("sys.stdin", io.StringIO('{"a": 1}')), pytest.raises(SystemExit):
+        ucol.main()
+
+
 def test_json_strict_same_keys():
     """Test --json --strict passes when all dicts have the same keys."""
     data = '[{"a": "1", "b": "2"}, {"a": "3", "b": "4"}]'
@@ -373,6 +882,129 @@ def test_json_null_value_does_not_affect_missing_keys():
     assert ans == [["x", "y"], ["1", ""], ["2", "N/A"]]
 
 
+JSON_PARITY = (
+    '[{"a": 1, "b": null, "c": "x", "d": "hello", "e": 5},'
+    ' {"a": 2, "c": null, "e": "world"}, {"f": "last"}]'
+)
+
+
+@pytest.mark.parametrize(
+    "spec",
+    (
+        "1",
+        "2",
+        "_1",
+        "_6",
+        "3 1",
+        "2+",
+        "_2",
+        "7+",
+        "2-4",
+        "_3-_1",
+        "5-2",
+        "4[2,3]",
+        "_2[,2]",
+        "6",
+        "7",
+        "1 4[1,2] 2-3 5+",
+    ),
+)
+def test_json_compact_parity(spec):
+    """Test selecting only the needed keys matches projecting full rows."""
+    cols = [ucol.column_specifier(c) for c in spec.split()]
+    dicts = json.loads(JSON_PARITY)
+    keys = list(dict.fromkeys(k for d in dicts for k in d))
+    expected = [[]]
+    for index in cols:
+        try:
+            expected[0].extend(index(keys))
+        except IndexError:
+            pass
+    project = ucol.projector(cols)
+    for d in dicts:
+        row = ["N" if d.get(k) is None and k in d else str(d.get(k, "")) for k in keys]
+        if (result := project(row)) is not None:
+            expected.append(result)
+    assert list(ucol.split_json(JSON_PARITY, cols, null_value="N")) == expected
+
+
+JSON_NESTED = (
+    '{"id": 1, "req": {"status": 200, "headers": {"host": "a"}},'
+    ' "items": [{"sku": "x1"}, {"sku": "x2"}]}\n'
+    '{"id": 2, "req": {"status": null}, "items": []}\n'
+    '{"id": 3, "req": "plain", "items": "text"}\n'
+)
+
+
+@pytest.mark.parametrize(
+    "spec, result",
+    (
+        ("req.status", [["req.status"], ["200"], ["N"], [""]]),
+        ("req.headers.host", [["req.headers.host"], ["a"], [""], [""]]),
+        ("items[0].sku", [["items[0].sku"], ["x1"], [""], [""]]),
+        ("items[-1].sku", [["items[-1].sku"], ["x2"], [""], [""]]),
+        (
+            "req",
+            [
+                ["req"],
+                ["{'status': 200, 'headers': {'host': 'a'}}"],
+                ["{'status': None}"],
+                ["plain"],
+            ],
+        ),
+        (
+            "1 req.status _1",
+            [
+                ["id", "req.status", "items"],
+                ["1", "200", "[{'sku': 'x1'}, {'sku': 'x2'}]"],
+                ["2", "N", "[]"],
+                ["3", "", "text"],
+            ],
+        ),
+    ),
+)
+def test_json_path(spec, result):
+    """Test nested JSON path columns."""
+    cols = [ucol.column_specifier(c) for c in spec.split()]
+    assert list(ucol.split_json(JSON_NESTED, cols, null_value="N")) == result
+
+
+@pytest.mark.parametrize(
+    "spec, path",
+    (
+        ("req.status", True),
+        ("items[0].sku", True),
+        ("_id", True),
+        ("a[1][2]", True),
+        ("1", False),
+        ("_1", False),
+        ("1x", None),
+        ("-x", None),
+        ("a..b", None),
+        ("a[x]", None),
+    ),
+)
+def test_column_specifier_path(spec, path):
+    """Test recognizing JSON path column specs."""
+    if path is None:
+        with pytest.raises(argparse.ArgumentTypeError):
+            ucol.column_specifier(spec)
+    else:
+        column = ucol.column_specifier(spec)
+        assert isinstance(column, ucol.ColumnSelectorPath) == path
+
+
+def test_json_path_main(capsys):
+    """Test a path column via main(), and its error without --json."""
+    sys.argv = ["ucol", "--json", "req.status", "id"]
+    with mock.patch("sys.stdin", io.StringIO(JSON_NESTED)):
+        ucol.main()
+    assert capsys.readouterr().out == "req.status id\n200 1\n 2\n 3\n"
+    sys.argv = ["ucol", "req.status"]
+    with pytest.raises(SystemExit):
+        ucol.main()
+
+
 def test_json_main(capsys):
     """Test --json via main()."""
     sys.argv = ["ucol", "--json", "1"]
@@ -404,3 +1036,514 @@ def test_json_to_csv(capsys):
     ):
         ucol.main()
     assert capsys.readouterr().out == "age,name\n30,Alice\n25,Bob\n"
+
+
+@pytest.mark.parametrize("indent", (None, 2))
+@pytest.mark.parametrize(
+    "items",
+    ([], [{}], [{"a": "1"}], [{"a": "1", "b": "x\ny"}, {"a": "2", "b": ""}]),
+)
+def test_json_writer(indent, items):
+    """Test streamed JSON output matches json.dumps of the whole list."""
+    out = io.StringIO()
+    writer = ucol.JsonWriter(out, indent)
+    for item in items:
+        writer.write(item)
+    writer.close()
+    assert out.getvalue() == json.dumps(items, indent=indent) + "\n"
+
+
+def test_to_json_main(capsys):
+    """Test --to-json via main()."""
+    sys.argv = ["ucol", "--to-json", "1", "3"]
+    with mock.patch("sys.stdin", io.StringIO("k1 x k2\na b c\nd e f")):
+        ucol.main()
+    out = capsys.readouterr().out
+    assert out == '[{"k1": "a", "k2": "c"}, {"k1": "d", "k2": "f"}]\n'
+
+
+def test_to_ndjson_main(capsys):
+    """Test --to-ndjson via main()."""
+    sys.argv = ["ucol", "--to-ndjson", "1", "3"]
+    with mock.patch("sys.stdin", io.StringIO("k1 x k2\na b c\nd e f")):
+        ucol.main()
+    out = capsys.readouterr().out
+    assert out == '{"k1": "a", "k2": "c"}\n{"k1": "d", "k2": "f"}\n'
+
+
+def test_output_buffer():
+    """Test output is collected and written in blocks."""
+    out = io.StringIO()
+    buffer = ucol.OutputBuffer(out, size=10)
+    buffer.write("12345\n")
+    assert out.getvalue() == ""
+    buffer.write("67890\n")
+    assert out.getvalue() == "12345\n67890\n"
+    buffer.write("x\n")
+    buffer.flush()
+    assert out.getvalue() == "12345\n67890\nx\n"
+
+
+@pytest.mark.parametrize("option", ("line_buffering", "write_through"))
+def test_terminal_output_per_row(option):
+    """Test each row reaches a terminal (or unbuffered stdout) right away."""
+    out = io.TextIOWrapper(io.BytesIO(), **{option: True})
+
+    def lines():
+        yield "1 2\n"
+        assert out.buffer.getvalue() == b"2\n"
+        yield "3 4\n"
+        assert out.buffer.getvalue() == b"2\n4\n"
+
+    sys.argv = ["ucol", "2"]
+    with mock.patch("sys.stdin", lines()), mock.patch("sys.stdout", out):
+        ucol.main()
+    assert out.buffer.getvalue() == b"2\n4\n"
+
+
+class ClosedPipe(io.StringIO):
+    """stdout whose reader has gone away"""
+
+    def write(self, s):
+        raise BrokenPipeError
+
+    def fileno(self):
+        return 1
+
+
+def test_broken_pipe():
+    """Test a closed output pipe stops reading input and exits quietly."""
+    data = "a b c\n" * 100000
+    stdin = io.StringIO(data)
+    sys.argv = ["ucol", "2"]
+    with (
+        mock.patch("sys.stdin", stdin),
+        mock.patch("sys.stdout", ClosedPipe()),
+        mock.patch("os.dup2") as dup2,
+        pytest.raises(SystemExit),
+    ):
+        ucol.main()
+    dup2.assert_called_once()
+    assert stdin.tell() < len(data)
+
+
+@pytest.mark.parametrize(
+    "args, result",
+    (
+        (["--skip", "1"], "5\nB\n"),
+        (["--limit", "2"], "2\n5\n"),
+        (["--skip", "1", "--limit", "1"], "5\n"),
+        (["--skip", "5"], ""),
+        (["--limit", "0"], ""),
+    ),
+)
+def test_skip_limit(args, result, capsys):
+    """Test --skip and --limit via main()."""
+    sys.argv = ["ucol", *args, "2"]
+    with mock.patch("sys.stdin", io.StringIO(DATA)):
+        ucol.main()
+    assert capsys.readouterr().out == result
+
+
+def test_skip_strict_line_number():
+    """Test --strict line numbers count skipped lines."""
+    sys.argv = ["ucol", "--skip", "1", "--strict", "2"]
+    with (
+        mock.patch("sys.stdin", io.StringIO(DATA_SPARSE)),
+        pytest.raises(ucol.UcolException, match="line=2:"),
+    ):
+        ucol.main()
+
+
+def test_limit_stops_reading():
+    """Test --limit stops reading input."""
+    data = "a b c\n" * 100000
+    stdin = io.StringIO(data)
+    sys.argv = ["ucol", "--limit", "3", "2"]
+    with mock.patch("sys.stdin", stdin):
+        ucol.main()
+    assert stdin.tell() < len(data)
+
+
+def test_json_skip_limit(capsys):
+    """Test --skip and --limit count JSON records, not the header."""
+    data = "".join(f'{{"a": {n}}}\n' for n in range(5))
+    sys.argv = ["ucol", "--json", "--skip", "1", "--limit", "2", "1"]
+    with mock.patch("sys.stdin", io.StringIO(data)):
+        ucol.main()
+    assert capsys.readouterr().out == "a\n1\n2\n"
+
+
+@pytest.mark.parametrize(
+    "options, result",
+    (
+        (
+            ("--to-ndjson", "--limit", "2"),
+            '{"a": "1", "b": "2"}\n{"a": "3", "b": "4"}\n',
+        ),
+        (("--to-json", "--limit", "1"), '[{"a": "1", "b": "2"}]\n'),
+        (("--to-json", "--limit", "0"), "[]\n"),
+    ),
+)
+def test_to_json_limit(capsys, options, result):
+    """Test --limit counts output objects, not the row used as JSON keys."""
+    sys.argv = ["ucol", *options]
+    with mock.patch("sys.stdin", io.StringIO("a b\n1 2\n3 4\n5 6\n")):
+        ucol.main()
+    assert capsys.readouterr().out == result
+
+
+def test_un_comma_columns(capsys):
+    """Test --un-comma-columns only changes the listed output columns."""
+    sys.argv = ["ucol", "--un-comma-columns", "2", "1", "2"]
+    with mock.patch("sys.stdin", io.StringIO("$1,000 $2,000\n")):
+        ucol.main()
+    assert capsys.readouterr().out == "$1,000 2000\n"
+
+
+@pytest.mark.parametrize("max_memory", (None, 1, 250, 1000, 10**6))
+def test_unique(max_memory):
+    """test first occurrences in order, with and without spilling"""
+    rows = [[str(i * 7 % 13), str(i % 3)] for i in range(300)]
+    expected = [list(row) for row in dict.fromkeys(map(tuple, rows))]
+    assert list(ucol.unique(iter(rows), max_memory)) == expected
+
+
+def test_unique_header():
+    """test the header row passes through"""
+    rows = [["a"], ["a"], ["b"], ["a"]]
+    assert list(ucol.unique(iter(rows), header=True)) == [["a"], ["a"], ["b"]]
+    assert list(ucol.unique(iter([]), header=True)) == []
+
+
+def test_unique_binary():
+    """test bytes rows"""
+    rows = [[b"a", b"b"], [b"a\0b"], [b"a", b"b"], [], [b""], [b"", b""], []]
+    assert list(ucol.unique(iter(rows), 1)) == rows[:2] + rows[3:6]
+
+
+@pytest.mark.parametrize(
+    "spec, result", (("100", 100), ("2k", 2048), ("3M", 3 << 20), ("1G", 1 << 30))
+)
+def test_memory_size(spec, result):
+    """test memory sizes"""
+    assert ucol.memory_size(spec) == result
+
+
+@pytest.mark.parametrize("spec", ("", "M", "1T", "-1", "1.5M"))
+def test_memory_size_invalid(spec):
+    """test invalid memory sizes"""
+    with pytest.raises(argparse.ArgumentTypeError):
+        ucol.memory_size(spec)
+
+
+@pytest.mark.parametrize("options", ((), ("--max-memory", "1")))
+def test_unique_main(capsys, options):
+    """test --unique via main(), after un-comma and before --limit"""
+    sys.argv = ["ucol", "--unique", "--un-comma", "--limit", "2", *options, "1"]
+    data = "1,000 a\n1000 b\n2 c\n1,000 d\n3 e\n"
+    with mock.patch("sys.stdin", io.StringIO(data)):
+        ucol.main()
+    assert capsys.readouterr().out == "1000\n2\n"
+
+
+def test_pipeline():
+    """test a pipeline reused on several inputs, lazily"""
+    pipeline = ucol.Pipeline(["3", "1"], delimiter=",", where=["2==GET"])
+    assert list(pipeline(["a,GET,1", "b,PUT,2", "c,GET,3\n"])) == [
+        ["1", "a"],
+        ["3", "c"],
+    ]
+
+    def lines():
+        yield "d,GET,4"
+        raise AssertionError("read past the first row")
+
+    assert next(pipeline(lines())) == ["4", "d"]
+
+
+@pytest.mark.parametrize(
+    "kwargs, lines, result",
+    (
+        ({}, ["a  b", "c d"], [["a", "b"], ["c", "d"]]),
+        ({"columns": ["2-3"]}, ["a b c"], [["b c"]]),
+        ({"is_csv": True}, ['"a,b",c\n'], [["a,b", "c"]]),
+        ({"widths": "1,2"}, ["abcd"], [["a", "bc"]]),
+        ({"un_comma": True}, ["1,000 $5"], [["1000", "5"]]),
+        ({"un_comma": [2]}, ["1,000 $5"], [["1,000", "5"]]),
+        ({"unique": True}, ["a", "b", "a"], [["a"], ["b"]]),
+        ({"binary": True, "columns": ["2"]}, [b"a b"], [[b"b"]]),
+        (
+            {"is_json": True, "columns": ["a.b"], "unique": True},
+            '[{"a": {"b": 1}}, {"a": {"b": 1}}]',
+            [["a.b"], ["1"]],
+        ),
+    ),
+)
+def test_pipeline_options(kwargs, lines, result):
+    """test pipeline options"""
+    assert list(ucol.Pipeline(**kwargs)(lines)) == result
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        {"columns": ["1x"]},
+        {"where": ["1"]},
+        {"widths": "0"},
+        {"widths": "auto", "is_csv": True},
+        {"where": ["1==a"], "binary": True},
+        {"binary": True, "un_comma": True},
+        {"columns": ["a.b"]},
+        {"is_json": True, "header_sample": 0},
+    ),
+)
+def test_pipeline_invalid(kwargs):
+    """test invalid pipeline options"""
+    with pytest.raises(ucol.UcolException):
+        ucol.Pipeline(**kwargs)
+
+
+SAMPLE_LINES = [f"{i} line{i}" for i in range(1000)]
+
+
+@pytest.mark.parametrize("count", (1, 10, 999, 1000, 2000))
+def test_reservoir_sample(count):
+    """test a sample of distinct lines in input order"""
+    sample = list(ucol.reservoir_sample(SAMPLE_LINES, count, random.Random(1)))
+    assert len(sample) == min(count, len(SAMPLE_LINES))
+    assert sample == sorted(set(sample), key=SAMPLE_LINES.index)
+    assert sample == list(ucol.reservoir_sample(SAMPLE_LINES, count, random.Random(1)))
+
+
+def test_reservoir_sample_uniform():
+    """test every line is about equally likely"""
+    rng = random.Random(2)
+    counts = collections.Counter()
+    for _ in range(2000):
+        counts.update(ucol.reservoir_sample(range(20), 5, rng))
+    # each line is expected 500 times
+    assert min(counts.values()) > 400 and max(counts.values()) < 600
+
+
+@pytest.mark.parametrize("rate", (0.01, 0.1, 0.5, 1))
+def test_bernoulli_sample(rate):
+    """test about rate of the lines, in input order"""
+    sample = list(ucol.bernoulli_sample(SAMPLE_LINES * 10, rate, random.Random(3)))
+    assert abs(len(sample) - rate * 10000) < max(4 * (rate * 10000) ** 0.5, 1)
+    if rate == 1:
+        assert sample == SAMPLE_LINES * 10
+
+
+@pytest.mark.parametrize("binary", (False, True))
+def test_seek_sample(tmp_path, binary):
+    """test lines read at random offsets"""
+    path = tmp_path / "data"
+    path.write_text("\r\n".join(SAMPLE_LINES) + "\r\n")
+    with open(path) as file:
+        sample = list(ucol.seek_sample(file, 50, random.Random(4), binary))
+    if binary:
+        sample = [line.decode() for line in sample]
+    assert 40 < len(sample) <= 50
+    assert sample == sorted(set(sample), key=SAMPLE_LINES.index)
+    assert set(sample) <= set(SAMPLE_LINES)
+
+
+def test_seek_sample_first_line(tmp_path):
+    """test the first line can be sampled"""
+    path = tmp_path / "data"
+    path.write_text("a\nb\n")
+    with open(path) as file:
+        assert list(ucol.seek_sample(file, 100, random.Random(5))) == ["a", "b"]
+
+
+@pytest.mark.parametrize(
+    "options",
+    (
+        ("--sample", "5"),
+        ("--sample-rate", "0.01"),
+        ("--sample", "5", "--sample-fast"),
+    ),
+)
+def test_sample_main(tmp_path, capsys, options):
+    """test sampling via main(), reproducible with --seed"""
+    path = tmp_path / "data"
+    path.write_text("\n".join(SAMPLE_LINES) + "\n")
+    sys.argv = ["ucol", *options, "--seed", "6", "-f", str(path), "2"]
+    ucol.main()
+    first = capsys.readouterr().out
+    ucol.main()
+    assert capsys.readouterr().out == first
+    lines = first.splitlines()
+    assert lines and set(lines) <= {f"line{i}" for i in range(1000)}
+
+
+@pytest.mark.parametrize(
+    "options",
+    (
+        ("--sample", "0"),
+        ("--sample-rate", "0"),
+        ("--sample-rate", "1.5"),
+        ("--sample", "1", "--sample-rate", "0.5"),
+        ("--sample", "1", "--csv"),
+        ("--sample-fast",),
+        ("--sample", "1", "--sample-fast"),
+    ),
+)
+def test_sample_main_invalid(options):
+    """test invalid sampling options"""
+    sys.argv = ["ucol", *options]
+    with pytest.raises(SystemExit):
+        ucol.main()
+
+
+@pytest.mark.parametrize(
+    "options",
+    (
+        # each seed samples line 57 but not every line before it
+        ("--seed", "0", "--sample", "100"),
+        ("--seed", "0", "--sample-rate", "0.5"),
+        ("--seed", "1", "--skip", "3", "--sample", "100"),
+    ),
+)
+def test_sample_main_strict(tmp_path, options):
+    """test --strict reports the file line number of a sampled line"""
+    path = tmp_path / "data"
+    lines = SAMPLE_LINES[:]
+    lines[56] = "short"
+    path.write_text("\n".join(lines) + "\n")
+    sys.argv = ["ucol", *options, "--strict", "-f", str(path), "2"]
+    with pytest.raises(ucol.UcolException, match="line=57:'short'"):
+        ucol.main()
+
+
+def test_sample_fast_strict(tmp_path):
+    """test --sample-fast can't report line numbers for --strict"""
+    path = tmp_path / "data"
+    path.write_text("\n".join(SAMPLE_LINES) + "\n")
+    sys.argv = ["ucol", "--sample", "5", "--sample-fast", "--strict", "-f", str(path)]
+    with pytest.raises(SystemExit):
+        ucol.main()
+
+
+def index_offsets(data, stride):
+    """Return the offsets of every stride'th line of data."""
+    starts = [0] + [m.end() for m in re.finditer(b"\n", data)]
+    return starts[::stride]
+
+
+@pytest.mark.parametrize("stride", (1, 3, 1000))
+def test_build_index(tmp_path, stride):
+    """test offsets of every stride'th complete line, extended as the file grows"""
+    path = tmp_path / "data"
+    data = "".join(f"{'x' * (i % 7)}{i}\n" for i in range(5000)).encode()
+    path.write_bytes(data[:10001])
+    ucol.build_index(str(path), stride)
+    with open(path, "ab") as file:
+        file.write(data[10001:])
+    index = ucol.build_index(str(path), stride)
+    assert list(index.offsets) == index_offsets(data, stride)
+    assert (index.size, index.lines) == (len(data), 5000)
+    loaded = ucol.LineIndex.load(str(path) + ucol.INDEX_SUFFIX)
+    assert loaded.offsets == index.offsets
+
+
+def test_build_index_partial_line(tmp_path):
+    """test a last line without a newline is indexed once complete"""
+    path = tmp_path / "data"
+    path.write_bytes(b"a\nb\nc")
+    index = ucol.build_index(str(path), 1)
+    assert (list(index.offsets), index.size, index.lines) == ([0, 2, 4], 4, 2)
+    with open(path, "ab") as file:
+        file.write(b"c\nd\n")
+    index = ucol.build_index(str(path), 1)
+    assert (list(index.offsets), index.size, index.lines) == ([0, 2, 4, 7, 9], 9, 4)
+
+
+def test_build_index_rewritten(tmp_path):
+    """test a rewritten file is indexed again from the start"""
+    path = tmp_path / "data"
+    path.write_bytes(b"a\nb\n")
+    ucol.build_index(str(path), 1)
+    path.write_bytes(b"aa\nbb\ncc\n")
+    assert list(ucol.build_index(str(path), 1).offsets) == [0, 3, 6, 9]
+
+
+@pytest.mark.parametrize("indexed", (False, True))
+@pytest.mark.parametrize(
+    "first, last", ((1, 1), (1, 5), (999, 1001), (2500, None), (4999, 6000))
+)
+def test_line_range(tmp_path, indexed, first, last):
+    """test reading a range of lines, with and without an index"""
+    path = tmp_path / "data"
+    lines = [f"line {i}\n" for i in range(1, 5001)]
+    path.write_text("".join(lines))
+    if indexed:
+        ucol.build_index(str(path), 1000)
+    with open(path) as file:
+        assert list(ucol.line_range(file, first, last)) == lines[first - 1 : last]
+
+
+def test_line_range_stale_index(tmp_path):
+    """test an index for other contents is not used"""
+    path = tmp_path / "data"
+    path.write_text("".join(f"{i}\n" for i in range(100)))
+    ucol.build_index(str(path), 10)
+    path.write_text("".join(f"x{i}\n" for i in range(100)))
+    with open(path) as file:
+        assert list(ucol.line_range(file, 15, 16)) == ["x14\n", "x15\n"]
+
+
+def test_line_range_rewritten_same_head(tmp_path):
+    """test an index is not used for a larger file with the same first bytes"""
+    path = tmp_path / "data"
+    lines = [f"line{i}\n" for i in range(1, 5001)]
+    path.write_text("".join(lines))
+    ucol.build_index(str(path), 1000)
+    lines[1000:] = [f"line{i}-longer-now\n" for i in range(1001, 5001)]
+    path.write_text("".join(lines))
+    with open(path) as file:
+        assert list(ucol.line_range(file, 3000, 3001)) == lines[2999:3001]
+
+
+def test_line_index_seek_rewritten(tmp_path):
+    """test seek refuses an indexed line that doesn't follow a newline"""
+    path = tmp_path / "data"
+    path.write_bytes(b"a\nb\nc\n")
+    index = ucol.build_index(str(path), 1)
+    path.write_bytes(b"aaa\nb\n")
+    with open(path, "rb") as file:
+        assert index.seek(file, 1) == 0
+        assert file.tell() == 0
+        assert index.seek(file, 2) == 2
+
+
+@pytest.mark.parametrize(
+    "spec, result", (("5", (5, 5)), ("5-10", (5, 10)), ("5-", (5, None)))
+)
+def test_lines_specifier(spec, result):
+    """test line ranges"""
+    assert ucol.lines_specifier(spec) == result
+
+
+@pytest.mark.parametrize("spec", ("", "0", "0-5", "5-4", "-5", "a-b"))
+def test_lines_specifier_invalid(spec):
+    """test invalid line ranges"""
+    with pytest.raises(argparse.ArgumentTypeError):
+        ucol.lines_specifier(spec)
+
+
+def test_lines_main(tmp_path, capsys):
+    """test --build-index and --lines via main()"""
+    path = tmp_path / "data"
+    path.write_text("".join(f"{i} x\n" for i in range(1, 3001)))
+    sys.argv = ["ucol", "--build-index", "-f", str(path)]
+    ucol.main()
+    assert capsys.readouterr().out == ""
+    assert (tmp_path / f"data{ucol.INDEX_SUFFIX}").exists()
+    sys.argv = ["ucol", "--lines", "2000-2002", "-f", str(path), "1"]
+    ucol.main()
+    assert capsys.readouterr().out == "2000\n2001\n2002\n"
+    sys.argv = ["ucol", "--lines", "1-2", "1"]
+    with pytest.raises(SystemExit):
+        ucol.main()
@@ -0,0 +1,247 @@
+"""Input file handling shared by the utool commands."""
+
+import argparse
+import bz2
+import collections
+import concurrent.futures
+import functools
+import gzip
+import io
+import itertools
+import lzma
+import os
+import queue
+import sys
+import threading
+import typing
+
+# leading bytes of each supported compression format and the module that reads it
+MAGIC = (
+    (b"\x1f\x8b", gzip),
+    (b"BZh", bz2),
+    (b"\xfd7zXZ\x00", lzma),
+)
+
+
+class ReadAhead(io.RawIOBase):
+    """Raw binary reader that reads ahead on a background thread.
+
+    file  - binary file object to read; closed when the reader is closed
+    name  - name reported by the reader
+    size  - number of bytes in each read
+    depth - number of reads buffered ahead of the consumer
+
+    Reading (and decompressing, when file is a gzip, bz2 or lzma file) happens
+    on the thread, overlapping with whatever the consumer does with the data.
+    An exception raised by the thread is raised by the next read.
+    """
+
+    def __init__(
+        self, file: typing.BinaryIO, name: str, size: int = 1 << 18, depth: int = 4
+    ):
+        super().__init__()
+        self.name = name
+        self._file = file
+        self._queue = queue.Queue(depth)
+        self._pending = memoryview(b"")
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._fill, args=(size,), daemon=True)
+        self._thread.start()
+
+    def _fill(self, size: int) -> None:
+        try:
+            while not self._stop.is_set():
+                data = self._file.read(size)
+                self._queue.put(data)
+                if not data:
+                    return
+        except Exception as exc:  # noqa: BLE001
+            # any error must reach the reader, which would otherwise wait for
+            # data forever
+            self._queue.put(exc)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            if self._done:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._done = True
+                raise item
+            if not item:
+                self._done = True
+                return 0
+            self._pending = memoryview(item)
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            self._file.close()
+        super().close()
+
+
+def input_file(path: str) -> typing.TextIO:
+    """Return a text file open on path, for use as an argparse type.
+
+    "-" is stdin. A gzip, bz2 or xz compressed file (recognized by its first
+    bytes, not its name) is decompressed on a read-ahead thread; since it is
+    not open on the file itself, it has no fileno.
+    """
+    if path == "-":
+        return sys.stdin
+    try:
+        binary = open(path, "rb")  # noqa: SIM115 - returned open
+    except OSError as err:
+        raise argparse.ArgumentTypeError(f"can't open '{path}': {err}") from err
+    module = _compression(binary)
+    if module:
+        raw = ReadAhead(module.open(binary), path)
+        return io.TextIOWrapper(io.BufferedReader(raw))
+    return io.TextIOWrapper(binary)
+
+
+def _compression(binary: io.BufferedReader):
+    """Return the module that decompresses binary, or None if not compressed."""
+    head = binary.peek(6)
+    for magic, module in MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+def _open_ahead(path: str, binary: bool = False) -> typing.IO:
+    """Return a file open on path that reads ahead on a background thread.
+
+    The file is (decompressed and) read a bounded number of chunks ahead, so
+    an open file holds little of its contents in memory. Returns once the
+    first chunk has been read. Text is decoded and has its line endings
+    translated as by input_file. Stdin ("-") is read whole.
+    """
+    if path == "-":
+        if binary:
+            return io.BytesIO(sys.stdin.buffer.read())
+        return io.StringIO(sys.stdin.read())
+    file = open(path, "rb")  # noqa: SIM115 - returned open
+    try:
+        module = _compression(file)
+        reader = io.BufferedReader(
+            ReadAhead(module.open(file) if module else file, path)
+        )
+        reader.peek(1)
+    except BaseException:
+        # e.g. a corrupt compressed file
+        file.close()
+        raise
+    return reader if binary else io.TextIOWrapper(reader)
+
+
+def prefetch(
+    paths: typing.Iterable[str],
+    load: typing.Callable[[str], typing.Any],
+    ordered: bool = True,
+    workers: int = 2,
+    discard: typing.Callable[[typing.Any], typing.Any] | None = None,
+) -> typing.Iterator[typing.Any]:
+    """Yield load(path) for each path, loading upcoming paths on a thread pool.
+
+    While one result is in use, up to workers + 1 more are loaded or waiting.
+    If ordered is False, results are yielded as they finish instead of in the
+    order of paths. If the generator is closed early, discard (if given) is
+    called on each result that was loaded but not yielded.
+    """
+    paths = iter(paths)
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        pending = collections.deque(
+            pool.submit(load, path) for path in itertools.islice(paths, workers + 1)
+        )
+        try:
+            while pending:
+                if ordered:
+                    done = pending.popleft()
+                else:
+                    finished, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    done = next(iter(finished))
+                    pending.remove(done)
+                for path in itertools.islice(paths, 1):
+                    pending.append(pool.submit(load, path))
+                yield done.result()
+        finally:
+            for future in pending:
+                if not future.cancel() and discard and not future.exception():
+                    discard(future.result())
+
+
+def open_files(
+    paths: typing.Iterable[str], binary: bool = False, ordered: bool = True
+) -> typing.Iterator[typing.IO]:
+    """Yield a file open on each of paths, opening upcoming files ahead.
+
+    Each file reads ahead on its own thread (see _open_ahead) while the one
+    before it is in use, and is closed when the next is requested. ordered
+    is as for prefetch.
+    """
+    files = prefetch(
+        paths,
+        functools.partial(_open_ahead, binary=binary),
+        ordered,
+        discard=lambda file: file.close(),
+    )
+    try:
+        for file in files:
+            with file:
+                yield file
+    finally:
+        files.close()
+
+
+def trailing_columns(
+    paths: list[str], convert: typing.Callable[[str], typing.Any]
+) -> tuple[list[str], list]:
+    """Split column arguments that follow the -f file names out of paths.
+
+    "-f *.log 3 7" collects "3" and "7" as file names. Working back from the
+    end, values that are not existing paths, have no directory separator and
+    that convert accepts are columns; the first path is always kept. Returns
+    (paths, converted columns).
+    """
+    separators = {os.sep, os.altsep} - {None}
+    end = len(paths)
+    while end > 1 and not os.path.exists(paths[end - 1]):
+        if separators.intersection(paths[end - 1]):
+            break
+        try:
+            convert(paths[end - 1])
+        except (argparse.ArgumentTypeError, TypeError, ValueError):
+            break
+        end -= 1
+    return paths[:end], [convert(value) for value in paths[end:]]
+
+
+def open_file(parser: argparse.ArgumentParser, path: str) -> typing.TextIO:
+    """Return input_file(path), exiting with a parser error if it can't be read."""
+    try:
+        return input_file(path)
+    except argparse.ArgumentTypeError as err:
+        parser.error(f"argument -f/--file: {err}")
+
+
+def check_paths(parser: argparse.ArgumentParser, paths: list[str]) -> None:
+    """Exit with a parser error if any of paths can't be read."""
+    for path in paths:
+        if path != "-" and not os.access(path, os.R_OK):
+            parser.error(f"argument -f/--file: can't open '{path}'")
@@ -0,0 +1,49 @@
+"""Numeric string handling shared by the utool commands."""
+
+import re
+import typing
+
+_COMMA_NUMBER = re.compile(r"-?(\$\d*|\$?\d{1,3}(,\d{3})+)(\.\d+)?$")
+_FIRST = frozenset("-$0123456789")
+
+
+def un_comma(value: str) -> str:
+    """remove commas and/or leading dollar signs ($) from numeric strings
+
+    The pattern only runs on values that start like a number and contain a
+    comma or dollar sign; anything else is returned unchanged.
+    """
+    if (
+        value[:1] in _FIRST
+        and ("," in value or "$" in value)
+        and _COMMA_NUMBER.match(value)
+    ):
+        return value.replace("$", "").replace(",", "")
+    return value
+
+
+def un_commaer(
+    columns: list[int] | None = None,
+) -> typing.Callable[[list[str]], list[str]]:
+    """Return a function that applies un_comma to a row.
+
+    columns - 1-based column numbers to normalize; if None, every column
+    """
+    if columns is None:
+
+        def _un_comma(row):
+            """Normalize every column."""
+            return [un_comma(value) for value in row]
+
+    else:
+        indexes = [column - 1 for column in columns]
+
+        def _un_comma(row):
+            """Normalize the numeric columns."""
+            row = list(row)
+            for index in indexes:
+                if index < len(row):
+                    row[index] = un_comma(row[index])
+            return row
+
+    return _un_comma
@@ -6,6 +6,8 @@ import io
 import sys
 from decimal import Decimal, InvalidOperation
 
+from utool import inputs
+
 
 def parse_break_spec(spec: str) -> tuple[list[str], list[str]]:
     """Parse a break spec like 'col1,col2:total1,total2' into ([break_cols], [subtotal_cols]).
@@ -208,9 +210,9 @@ def main() -> None:
     parser.add_argument(
         "-f",
         "--file",
-        type=argparse.FileType("r"),
+        type=inputs.input_file,
         default=sys.stdin,
-        help="input file (default=stdin)",
+        help="input file, may be gzip, bz2 or xz compressed (default=stdin)",
     )
     parser.add_argument(
         "-o",
@@ -1,13 +1,34 @@
 """Split text into columns."""
 
 import argparse
+import array
+import collections
+import concurrent.futures
+import contextlib
+import copy
 import csv
+import hashlib
+import heapq
+import io
+import itertools
 import json
+import locale
+import math
+import mmap
+import operator
+import os
+import pickle
+import random
 import re
+import stat
 import string
+import struct
 import sys
+import tempfile
 import typing
 
+from utool import inputs, numeric
+
 
 class UcolException(Exception):
     """ucol specific exception."""
@@ -15,9 +36,7 @@ class UcolException(Exception):
 
 def remove_comma(val: str) -> str:
     """remove commas and/or leading dollar signs ($) from numeric strings"""
-    if re.match(r"-?(\$\d*|\$?\d{1,3}(,\d{3})+)(\.\d+)?$", val):
-        return val.replace("$", "").replace(",", "")
-    return val
+    return numeric.un_comma(val)
 
 
 def as_alpha(value: int) -> str:
@@ -41,16 +60,122 @@ def row_to_sc(row: list[str], row_num: int) -> typing.Iterator[str]:
             yield f'leftstring {cell_number} = "{cell}"'
 
 
+class OutputBuffer:
+    """File-like object that collects output and writes it in large blocks.
+
+    out - file to write to
+    binary - if True, bytes are written instead of str
+    size - number of characters (or bytes) collected before writing; 1 writes
+           each row as it comes
+    """
+
+    def __init__(self, out: typing.IO, binary: bool = False, size: int = 1 << 16):
+        self.out = out
+        self.empty = b"" if binary else ""
+        self.size = size
+        self.parts = []
+        self.length = 0
+
+    def write(self, text: str | bytes) -> int:
+        """Collect text; write the collected output once it reaches size."""
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.size:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        """Write the collected output.
+
+        A closed pipe downstream raises BrokenPipeError here, no later than
+        size characters after it closed.
+        """
+        if self.parts:
+            self.out.write(self.empty.join(self.parts))
+            self.parts = []
+            self.length = 0
+        self.out.flush()
+
+
+class JsonWriter:
+    """Write dicts as JSON as they are produced.
+
+    By default the output is a list of dicts, identical to json.dumps of the
+    whole list with the same indent; if lines is True, each dict is written
+    on its own line (NDJSON).
+    """
+
+    def __init__(
+        self, out: typing.TextIO, indent: int | None = None, lines: bool = False
+    ):
+        self.out = out
+        self.indent = indent
+        self.lines = lines
+        self.count = 0
+
+    def write(self, item: dict) -> None:
+        """Write one dict."""
+        if self.lines:
+            self.out.write(json.dumps(item) + "\n")
+            return
+        text = json.dumps(item, indent=self.indent)
+        if self.indent is None:
+            self.out.write((", " if self.count else "[") + text)
+        else:
+            pad = " " * self.indent
+            text = pad + text.replace("\n", "\n" + pad)
+            self.out.write((",\n" if self.count else "[\n") + text)
+        self.count += 1
+
+    def close(self) -> None:
+        """Finish the list."""
+        if self.lines:
+            return
+        if not self.count:
+            self.out.write("[]\n")
+        elif self.indent is None:
+            self.out.write("]\n")
+        else:
+            self.out.write("\n]\n")
+
+
 def linesplitter(
     is_csv: bool,
     is_tsv: bool,
     delimiter: str,
     nullable: bool,
     strip: bool,
+    maxsplit: int = -1,
+    binary: bool = False,
 ) -> typing.Callable[[str], list[str]]:
-    """Return a function to split lines."""
+    """Return a function to split lines.
+
+    The cheapest exact strategy is chosen for the configuration: str.split
+    for whitespace and single character delimiters, and a precompiled
+    pattern only for the cases str.split can't express.
+
+    If maxsplit is not -1, at most maxsplit splits are done; the first
+    maxsplit columns match an unbounded split and the rest of the line
+    is left in the last column. This is ignored for csv and tsv.
+
+    If binary is True, the function splits bytes instead of str (csv and
+    tsv are not supported); a delimiter character that encodes to several
+    bytes is matched as that byte sequence.
+    """
+    _limit = max(maxsplit, 0)  # re.split spelling of maxsplit
+    empty, plus, whitespace = "", "+", r"\s"
+    multibyte = None
+    if binary:
+        empty, plus, whitespace = b"", b"+", rb"\s"
+        if delimiter is not None:
+            units = [os.fsencode(char) for char in delimiter]
+            if any(len(unit) > 1 for unit in units):
+                multibyte = b"(?:" + b"|".join(map(re.escape, units)) + b")"
+            delimiter = os.fsencode(delimiter)
 
     def regex_delimiter(delimiter):
+        if binary:
+            return b"[" + (rb"\^" if delimiter == b"^" else delimiter) + b"]"
         if delimiter == "^":
             delimiter = r"\^"
         return f"[{delimiter}]"
@@ -67,45 +192,145 @@ def linesplitter(
             """Use csv module with tab dialect."""
             return next(iter(csv.reader([line], dialect='excel-tab')))
 
+    elif multibyte:
+        _pattern = re.compile(multibyte if nullable else multibyte + plus)
+        _ends = re.compile(rb"\A" + multibyte + rb"+|" + multibyte + rb"+\Z")
+
+        def _split(line):
+            """Split on the encoded delimiter characters."""
+            if strip:
+                line = _ends.sub(b"", line)
+            return _pattern.split(line, _limit)
+
     elif nullable and delimiter is None:
+        _pattern = re.compile(whitespace)
 
         def _split(line):
             """Split on whitespace character."""
             if strip:
                 line = line.strip()
-            return re.split(r"\s", line)
+            return _pattern.split(line, _limit)
 
-    elif nullable:
-        _delimiter = regex_delimiter(delimiter)
+    elif nullable and len(delimiter) == 1:
 
         def _split(line):
             """Split on delimiter character."""
             if strip:
                 line = line.strip(delimiter)
-            return re.split(_delimiter, line)
+            return line.split(delimiter, maxsplit)
 
-    elif delimiter is None:
+    elif nullable:
+        _pattern = re.compile(regex_delimiter(delimiter))
+
+        def _split(line):
+            """Split on any delimiter character."""
+            if strip:
+                line = line.strip(delimiter)
+            return _pattern.split(line, _limit)
+
+    elif delimiter is None and strip:
 
         def _split(line):
             """Split on whitespace characters."""
+            return line.split(None, maxsplit) or [empty]
+
+    elif delimiter is None:
+
+        def _split(line):
+            """Split on whitespace characters, keeping leading/trailing nulls."""
+            cols = line.split(None, maxsplit)
+            if line[:1].isspace():
+                cols.insert(0, empty)
+            if line[-1:].isspace():
+                cols.append(empty)
+            return cols or [empty]
+
+    elif len(delimiter) == 1:
+        _repeated = delimiter * 2
+        _pattern = re.compile(re.escape(delimiter) + plus)
+
+        def _split(line):
+            """Split on delimiter characters."""
             if strip:
-                line = line.strip()
-            return re.split(r"\s+", line)
+                line = line.strip(delimiter)
+            if _repeated not in line:
+                return line.split(delimiter, maxsplit)
+            if maxsplit >= 0:
+                return _pattern.split(line, maxsplit)
+            cols = [col for col in line.split(delimiter) if col]
+            if not strip:
+                if line[:1] == delimiter:
+                    cols.insert(0, empty)
+                if line[-1:] == delimiter:
+                    cols.append(empty)
+            return cols
 
     else:
-        _delimiter = regex_delimiter(delimiter) + "+"
+        _pattern = re.compile(regex_delimiter(delimiter) + plus)
 
         def _split(line):
-            """Split on delimiter characters."""
+            """Split on any delimiter characters."""
             if strip:
                 line = line.strip(delimiter)
-            return re.split(_delimiter, line)
+            return _pattern.split(line, _limit)
+
+    return _split
+
+
+WIDTH_SAMPLE = 100  # lines used to infer fixed-width columns
+
+
+def infer_widths(lines: list[str]) -> list[tuple[int, int | None]]:
+    """Return fixed-width column offsets that fit every line in lines.
+
+    A column starts wherever a character position is non-blank in some line
+    and the position before it is blank in every line. The first column
+    starts at 0 and the last one extends to the end of the line.
+    """
+    used = []
+    for line in lines:
+        for match in re.finditer(r"\S+", line):
+            if match.end() > len(used):
+                used.extend([False] * (match.end() - len(used)))
+            used[match.start() : match.end()] = [True] * (match.end() - match.start())
+    starts = [
+        pos for pos, flag in enumerate(used) if flag and (pos == 0 or not used[pos - 1])
+    ]
+    starts[:1] = [0]
+    return list(zip(starts, [*starts[1:], None], strict=True))
+
+
+def fixedsplitter(
+    offsets: list[tuple[int, int | None]], strip: bool
+) -> typing.Callable[[str], list[str]]:
+    """Return a function that cuts lines into fixed-width columns.
+
+    offsets is a list of (start, end) character positions for each column
+    (end None for the rest of the line); if strip is True, padding is
+    stripped from each column.
+    """
+    slices = [slice(start, end) for start, end in offsets]
+
+    if strip:
+
+        def _split(line):
+            """Cut and strip columns."""
+            return [line[cut].strip() for cut in slices]
+
+    else:
+
+        def _split(line):
+            """Cut columns."""
+            return [line[cut] for cut in slices]
 
     return _split
 
 
 class ColumnSelector:
-    """Callable that returns a column by index."""
+    """Callable that returns a column by index.
+
+    width is the number of columns a row needs for the selector to succeed.
+    """
 
     def __init__(self, index):
         if index[0] == "_":
@@ -113,6 +338,7 @@ class ColumnSelector:
         self.index = int(index)
         if self.index > 0:
             self.index -= 1
+        self.width = self.index + 1 if self.index >= 0 else -self.index
 
     def __call__(self, columns: list[str]) -> list[str]:
         return [columns[self.index]]
@@ -121,6 +347,10 @@ class ColumnSelector:
 class ColumnSelectorRange(ColumnSelector):
     """Callable that returns the set of columns beginning with an index."""
 
+    def __init__(self, index):
+        super().__init__(index)
+        self.width = 0
+
     def __call__(self, columns: list[str]) -> list[str]:
         return columns[self.index :]
 
@@ -144,6 +374,7 @@ class ColumnSelectorGroup:
         else:
             self.end = end_int + 1
         self.delimiter = " "
+        self.width = 0
 
     def __call__(self, columns: list[str]) -> list[str]:
         return [self.delimiter.join(columns[self.start : self.end])]
@@ -176,77 +407,316 @@ class ColumnSelectorSlice(ColumnSelector):
         return [column[self.start : self.end]]
 
 
-def _parse_json_dicts(data: str) -> list[dict]:
-    """Parse JSON data as either a list of dicts or a sequence of dicts.
+_MISSING = object()
+_PATH_SPEC = re.compile(r"(?![-\d])[^.\[\]]+(\[-?\d+\])*(\.[^.\[\]]+(\[-?\d+\])*)*$")
+_PATH_STEP = re.compile(r"\[(-?\d+)\]|([^.\[\]]+)")
+
+
+class ColumnSelectorPath:
+    """Selects a value from nested JSON by a path like req.status or items[0].sku.
+
+    The path is parsed once into a chain of dict keys and list indexes; get
+    follows the chain through a record. Only used with --json.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.steps = [
+            (list, int(index)) if index else (dict, key)
+            for index, key in _PATH_STEP.findall(path)
+        ]
+        self.width = 0
+
+    def get(self, record: dict) -> typing.Any:
+        """Return the value at the path in record, or _MISSING."""
+        value = record
+        for kind, step in self.steps:
+            if type(value) is not kind:
+                return _MISSING
+            if kind is dict:
+                value = value.get(step, _MISSING)
+                if value is _MISSING:
+                    return value
+            else:
+                try:
+                    value = value[step]
+                except IndexError:
+                    return _MISSING
+        return value
+
+
+_COMPARE = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class ColumnFilter:
+    """Callable that tests a column of a row against a value.
+
+    op is one of:
+      == (or =), !=, <, <=, >, >= - compare; if value is a number, the
+                                    column is compared as a number (rows
+                                    with a non-numeric column only pass !=)
+      ~, !~                       - value is a regex that is (or is not)
+                                    found in the column
+      in, not in                  - value is a comma separated list that
+                                    does (or does not) contain the column
+    Rows too short to have the column don't pass.
+    """
+
+    def __init__(self, column, op, value):
+        self.index = ColumnSelector(column).index
+        self.negate = op in ("!~", "not in")
+        self.pattern = None
+        self.values = None
+        self.compare = _COMPARE.get(op)
+        self.value = value
+        self.number = None
+        if op in ("~", "!~"):
+            self.pattern = re.compile(value)
+        elif op in ("in", "not in"):
+            self.values = frozenset(value.split(","))
+        else:
+            try:
+                self.number = float(value)
+            except ValueError:
+                pass
+
+    def __call__(self, columns: list[str]) -> bool:
+        try:
+            column = columns[self.index]
+        except IndexError:
+            return False
+        if self.pattern is not None:
+            return (self.pattern.search(column) is None) == self.negate
+        if self.values is not None:
+            return (column in self.values) != self.negate
+        if self.number is not None:
+            try:
+                return self.compare(float(column), self.number)
+            except ValueError:
+                return self.compare is operator.ne
+        return self.compare(column, self.value)
+
+
+def row_filter(
+    filters: list[ColumnFilter],
+) -> typing.Callable[[list[str]], bool] | None:
+    """Return a function that is True for rows that pass every filter.
+
+    Return None if there are no filters.
+    """
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+
+    def _test(columns):
+        """Apply each filter in turn."""
+        for test in filters:
+            if not test(columns):
+                return False
+        return True
+
+    return _test
+
+
+def projector(
+    indexes: list[ColumnSelector],
+) -> typing.Callable[[list[str]], list[str] | None]:
+    """Return a function that applies indexes to a row of columns.
+
+    The selectors are compiled once: plain column selectors become a single
+    operator.itemgetter, and the width a row needs is checked with one len()
+    instead of catching IndexError per selector. The function returns None
+    if the row has too few columns.
+    """
+    width = max((index.width for index in indexes), default=0)
+
+    if indexes and all(type(index) is ColumnSelector for index in indexes):
+        getter = operator.itemgetter(*(index.index for index in indexes))
+        if len(indexes) == 1:
+
+            def _project(columns):
+                """Select one column."""
+                if len(columns) < width:
+                    return None
+                return [getter(columns)]
+
+        else:
+
+            def _project(columns):
+                """Select plain columns."""
+                if len(columns) < width:
+                    return None
+                return list(getter(columns))
+
+    else:
+        steps = [
+            (
+                (True, operator.itemgetter(index.index))
+                if type(index) is ColumnSelector
+                else (False, index)
+            )
+            for index in indexes
+        ]
+
+        def _project(columns):
+            """Apply each selector in turn."""
+            if len(columns) < width:
+                return None
+            result = []
+            for single, step in steps:
+                if single:
+                    result.append(step(columns))
+                else:
+                    result.extend(step(columns))
+            return result
+
+    return _project
+
+
+_JSON_GAP = re.compile(r"[\s,]*")
+_JSON_END = frozenset(" \t\r\n,]")
+
 
+def _chunks(
+    data: typing.TextIO | typing.Iterable[str] | str, size: int
+) -> typing.Iterator[str]:
+    """Yield data in pieces of about size characters."""
+    if isinstance(data, str):
+        yield data
+    elif hasattr(data, "read"):
+        while chunk := data.read(size):
+            yield chunk
+    else:
+        yield from data
+
+
+def _iter_json_dicts(
+    data: typing.TextIO | typing.Iterable[str] | str, chunk_size: int = 1 << 16
+) -> typing.Iterator[typing.Any]:
+    """Yield the elements of JSON data as each one is decoded.
+
+    data is either a list of dicts or a sequence of dicts.
     A list of dicts is a JSON array: [{...}, {...}].
     A sequence of dicts is one or more dicts separated by newlines,
     possibly pretty-printed.
+
+    The input is read chunk_size characters at a time and each element is
+    decoded with JSONDecoder.raw_decode as soon as it is complete, so only
+    the element being decoded is held in memory.
     """
-    data = data.strip()
-    if data.startswith("["):
-        try:
-            result = json.loads(data)
-            if isinstance(result, list):
-                return result
-        except json.JSONDecodeError:
-            pass
-    # Parse as sequence of dicts by tracking brace depth
-    dicts = []
-    depth = 0
-    in_string = False
-    escape = False
-    start = None
-    for i, ch in enumerate(data):
-        if escape:
-            escape = False
+    decoder = json.JSONDecoder()
+    chunks = _chunks(data, chunk_size)
+    buf, pos, eof = "", 0, False
+    in_list = False
+
+    def more(buf, pos, need):
+        """Append chunks until at least need unconsumed characters."""
+        nonlocal eof
+        parts = [buf[pos:]]
+        have = len(parts[0])
+        while have < need:
+            if (chunk := next(chunks, None)) is None:
+                eof = True
+                break
+            parts.append(chunk)
+            have += len(chunk)
+        return "".join(parts), 0
+
+    while True:
+        pos = _JSON_GAP.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                return
+            buf, pos = more(buf, pos, 1)
             continue
-        if ch == "\\" and in_string:
-            escape = True
+        if buf[pos] == "[" and not in_list:
+            in_list = True
+            pos += 1
             continue
-        if ch == '"':
-            in_string = not in_string
+        if buf[pos] == "]" and in_list:
+            in_list = False
+            pos += 1
+            continue
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # incomplete element: at least double what is buffered
+            buf, pos = more(buf, pos, 2 * (len(buf) - pos))
             continue
-        if in_string:
+        if (
+            not eof
+            and not isinstance(value, (dict, list))
+            and (end == len(buf) or buf[end] not in _JSON_END)
+        ):
+            # a scalar (e.g. a number) may continue in the next chunk
+            buf, pos = more(buf, pos, len(buf) - pos + 1)
             continue
-        if ch == "{":
-            if depth == 0:
-                start = i
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0 and start is not None:
-                dicts.append(json.loads(data[start : i + 1]))
-                start = None
-    return dicts
-
-
-def split_json(
-    data: str,
+        pos = end
+        yield value
+
+
+def split_json(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    data: typing.TextIO | typing.Iterable[str] | str,
     indexes: list[ColumnSelector],
     strict: bool = False,
     null_value: str = "",
+    header_sample: int | None = None,
 ) -> typing.Iterator[list[str]]:
     """Split JSON data into columns.
 
-    data - JSON string (list of dicts or sequence of dicts)
+    data - open file or JSON string (list of dicts or sequence of dicts)
     indexes - list of ColumnSelectors
     strict - if True, all dicts must have the same keys
     null_value - string to use for JSON null values (default="")
+    header_sample - if not None, the header is the union of the keys of the
+                    first header_sample dicts, and the remaining dicts are
+                    streamed without being held in memory; keys not in the
+                    header are ignored. If None, the header is the union of
+                    the keys of every dict.
     """
-    dicts = _parse_json_dicts(data)
-    if not dicts:
+    return _split_dicts(
+        _iter_json_dicts(data), indexes, strict, null_value, header_sample
+    )
+
+
+def _split_dicts(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    dicts: typing.Iterator[typing.Any],
+    indexes: list[ColumnSelector],
+    strict: bool,
+    null_value: str,
+    header_sample: int | None,
+) -> typing.Iterator[list[str]]:
+    """Split decoded JSON elements into columns (see split_json)."""
+    sample = list(itertools.islice(dicts, header_sample))
+    if not sample:
         return
-    # Validate and collect keys
-    keys = []
-    seen_keys = set()
-    for i, d in enumerate(dicts):
+    first_keys = list(sample[0].keys()) if isinstance(sample[0], dict) else None
+
+    def check(i, d):
+        """Validate the i'th element."""
         if not isinstance(d, dict):
             raise UcolException(f"JSON element {i} is not a dict")
-        if strict and i > 0 and list(d.keys()) != list(dicts[0].keys()):
+        if strict and i > 0 and list(d.keys()) != first_keys:
             raise UcolException(
-                f"JSON dict {i + 1} keys {list(d.keys())} != {list(dicts[0].keys())}"
+                f"JSON dict {i + 1} keys {list(d.keys())} != {first_keys}"
             )
+
+    # Validate and collect keys
+    keys = []
+    seen_keys = set()
+    for i, d in enumerate(sample):
+        check(i, d)
         for k in d.keys():
             if k not in seen_keys:
                 keys.append(k)
@@ -254,31 +724,213 @@ def split_json(
     # Yield header row
     header = []
     for index in indexes:
+        if isinstance(index, ColumnSelectorPath):
+            header.append(index.path)
+            continue
         try:
             header.extend(index(keys))
         except IndexError:
             pass
     yield header
-    # Yield data rows
-    for i, d in enumerate(dicts):
-        cols = [null_value if d.get(k) is None and k in d else str(d.get(k, "")) for k in keys]
-        result = []
-        for index in indexes:
-            try:
-                result.extend(index(cols))
-            except IndexError:
-                if not strict:
-                    result = None
-                    break
-                raise UcolException(
-                    f"JSON dict {i + 1} does not have enough columns"
-                ) from None
-        if result is not None:
-            yield result
+    # Yield data rows, looking up only the keys the selectors use; path values
+    # follow the keys in each row
+    short = len(keys) < max((index.width for index in indexes), default=0)
+    if not short:
+        paths = [index for index in indexes if isinstance(index, ColumnSelectorPath)]
+        positions, selectors = _compact_selectors(
+            [index for index in indexes if index not in paths], len(keys)
+        )
+        needed = [keys[position] for position in positions]
+        selectors = iter(selectors)
+        slots = itertools.count(len(needed) + 1)
+        project = projector(
+            [
+                ColumnSelector(str(next(slots))) if index in paths else next(selectors)
+                for index in indexes
+            ]
+        )
+    for i, d in enumerate(itertools.chain(sample, dicts)):
+        if i >= len(sample):
+            check(i, d)
+        if short:
+            if strict:
+                raise UcolException(f"JSON dict {i + 1} does not have enough columns")
+            continue
+        row = [
+            null_value if (value := d.get(k, "")) is None else str(value)
+            for k in needed
+        ]
+        for path in paths:
+            value = path.get(d)
+            if value is _MISSING:
+                row.append("")
+            else:
+                row.append(null_value if value is None else str(value))
+        yield project(row)
+
+
+def _compact_selectors(
+    indexes: list[ColumnSelector], count: int
+) -> tuple[list[int], list[ColumnSelector]]:
+    """Remap indexes onto only the columns they use.
+
+    count is the number of columns in a row (which must be at least the width
+    of every selector). Returns the positions of the used columns, in order,
+    and selectors that give the same result on a row holding only the columns
+    at those positions.
+    """
+    columns = range(count)
+    used = []
+    for index in indexes:
+        if isinstance(index, ColumnSelectorGroup):
+            used.extend(columns[index.start : index.end])
+        elif isinstance(index, ColumnSelectorRange):
+            used.extend(columns[index.index :])
+        else:
+            used.append(columns[index.index])
+    positions = sorted(set(used))
+    compact = {position: number for number, position in enumerate(positions)}
+
+    def remap(index):
+        """Return a copy of index that selects from the used columns."""
+        index = copy.copy(index)
+        if isinstance(index, ColumnSelectorGroup):
+            group = columns[index.start : index.end]
+            if group:
+                index.start = compact[group[0]]
+                index.end = compact[group[-1]] + 1
+            else:
+                index.start = index.end = 0
+        elif isinstance(index, ColumnSelectorRange):
+            tail = columns[index.index :]
+            index.index = compact[tail[0]] if tail else len(positions)
+        else:
+            index.index = compact[columns[index.index]]
+            index.width = index.index + 1
+        return index
+
+    return positions, [remap(index) for index in indexes]
+
+
+def _split_json_files(
+    files: typing.Iterable[str],
+    indexes: list[ColumnSelector],
+    strict: bool = False,
+    null_value: str = "",
+    header_sample: int | None = None,
+) -> typing.Iterator[list[str]]:
+    """Split the JSON documents in files as one sequence of dicts.
+
+    There is one header for every file, so a numeric column selects the same
+    key in each of them.
+    """
+    dicts = itertools.chain.from_iterable(_iter_json_dicts(data) for data in files)
+    return _split_dicts(dicts, indexes, strict, null_value, header_sample)
+
+
+def _text_records(
+    data: typing.Iterable[str],
+    splitter: typing.Callable[[str], list[str]],
+    first_lineno: int = 1,
+    newline: str | bytes = "\n",
+    numbered: bool = False,
+) -> typing.Iterator[tuple[int, str, list[str]]]:
+    """Yield (line number, line, columns) for each line in data.
+
+    If numbered, data holds (line number, line) pairs.
+    """
+    for lineno, line in data if numbered else enumerate(data, start=first_lineno):
+        if line.endswith(newline):
+            line = line[:-1]
+        yield lineno, line, splitter(line)
+
+
+CSV_BLOCK = 256  # lines checked for quotes at a time by _csv_records
+
+
+def _csv_records(
+    data: typing.Iterable[str], is_tsv: bool, first_lineno: int = 1
+) -> typing.Iterator[tuple[int, str, list[str]]]:
+    """Yield (line number, line, columns) for each record in data.
+
+    Lines are checked CSV_BLOCK at a time: a block without a quote or
+    carriage return is split with str.split, which gives the same columns
+    the csv reader would. Otherwise, lines with a quote or carriage return
+    are handed to a single csv reader fed from the same stream, so quoted
+    fields containing newlines are kept together. The line number is that
+    of the last line of the record.
+    """
+    dialect = "excel-tab" if is_tsv else "excel"
+    delimiter = "\t" if is_tsv else ","
+    size_limit = csv.field_size_limit()
+    lines = iter(data)
+    lineno = first_lineno - 1
+    block = collections.deque()
+    pending = []
+
+    def feed():
+        """Yield the line handed to the reader, then lines it reads on."""
+        nonlocal lineno
+        while True:
+            if pending:
+                yield pending.pop()
+                continue
+            if block:
+                line = block.popleft()
+            else:
+                line = next(lines, None)
+                if line is None:
+                    return
+            lineno += 1
+            yield line
+
+    reader = csv.reader(feed(), dialect=dialect)
+    while block.extend(itertools.islice(lines, CSV_BLOCK)) or block:
+        text = "".join(block)
+        if (
+            '"' not in text
+            and "\r" not in text
+            and text.count("\n") <= len(block)
+            and len(text) <= size_limit
+        ):
+            for line in block:
+                lineno += 1
+                line = line.removesuffix("\n")
+                yield lineno, line, line.split(delimiter) if line else []
+            block.clear()
+            continue
+        while block:
+            line = block.popleft()
+            lineno += 1
+            if '"' in line or "\r" in line or len(line) > size_limit:
+                # the reader reads on from the block for quoted newlines
+                pending.append(line)
+                cols = next(reader)
+                yield lineno, delimiter.join(cols), cols
+                continue
+            line = line.removesuffix("\n")
+            yield lineno, line, line.split(delimiter) if line else []
+
+
+def split_limit(indexes: list[ColumnSelector]) -> int:
+    """Return the smallest maxsplit that yields every column indexes use.
+
+    Only plain and substring selectors with positive column numbers can
+    bound the split; anything else (negative columns, N+ ranges, groups)
+    needs the whole line split, which is indicated by returning -1.
+    """
+    limit = -1
+    for index in indexes:
+        if isinstance(index, (ColumnSelectorRange, ColumnSelectorGroup)):
+            return -1
+        if index.index < 0:
+            return -1
+        limit = max(limit, index.index + 1)
+    return limit
 
 
 def split(  # pylint: disable=too-many-positional-arguments,too-many-arguments
-    data: typing.TextIO,
+    data: typing.TextIO | typing.Iterable[str] | str,
     indexes: list[ColumnSelector],
     delimiter: str | None = None,
     nullable: bool = False,
@@ -286,10 +938,16 @@ def split(  # pylint: disable=too-many-positional-arguments,too-many-arguments
     strict: bool = False,
     is_csv: bool = False,
     is_tsv: bool = False,
+    first_lineno: int = 1,
+    binary: bool = False,
+    widths: list[tuple[int, int | None]] | str | None = None,
+    where: list[ColumnFilter] | None = None,
+    numbered: bool = False,
 ) -> typing.Iterator[list[str]]:
     """Split text into columns.
 
-    data - open file
+    data - open file or other iterable of lines (read one line at a time);
+           a str is split into lines
     indexes - list of ColumnSelectors
     delimiter - separator between input columns
                 multiple sequential delimiters will result in multiple
@@ -298,30 +956,702 @@ def split(  # pylint: disable=too-many-positional-arguments,too-many-arguments
     nullable - control parsing of multiple delimiters (see delimiter)
     strip - strip leading and trailing delimiters from line
     strict - if True, stop on rows that have too few columns, else skip
-    is_csv - if True, parse each line with csv reader
-    is_tsv - if True, parse each line with tsv reader
+    is_csv - if True, parse the input with a csv reader
+    is_tsv - if True, parse the input with a tsv reader
+    first_lineno - line number of the first line in data (for error messages)
+    binary - if True, data is bytes lines (or bytes) and rows are lists of
+             bytes; not supported with is_csv or is_tsv
+    widths - if not None, cut lines into fixed-width columns instead of
+             splitting on a delimiter: a list of (start, end) offsets (see
+             fixedsplitter), or "auto" to infer them (see infer_widths) from
+             the first WIDTH_SAMPLE lines; not supported with is_csv or is_tsv
+    where - list of ColumnFilters; rows that fail any of them are dropped
+            before columns are selected
+    numbered - if True, data is an iterable of (line number, line) pairs, for
+               lines that aren't numbered one after another from first_lineno
+               (e.g. a sample); not supported with is_csv or is_tsv
     """
-    splitter = linesplitter(is_csv, is_tsv, delimiter, nullable, strip)
     group_delim = delimiter if delimiter is not None else " "
+    if binary:
+        group_delim = os.fsencode(group_delim)
     for index in indexes:
         if isinstance(index, ColumnSelectorGroup):
             index.delimiter = group_delim
 
-    for lineno, line in enumerate(data.splitlines(), start=1):
-        cols = splitter(line)
-        result = []
-        for index in indexes:
-            try:
-                result.extend(index(cols))
-            except IndexError:
-                if not strict:
-                    result = None
-                    break
+    if is_csv or is_tsv:
+        if isinstance(data, str):
+            data = io.StringIO(data)
+        records = _csv_records(data, is_tsv, first_lineno)
+    else:
+        if isinstance(data, (str, bytes)):
+            data = data.splitlines()
+        if widths == "auto":
+            data = iter(data)
+            sample = list(itertools.islice(data, WIDTH_SAMPLE))
+            lines = [line for _, line in sample] if numbered else sample
+            if binary:
+                widths = infer_widths([line.decode("latin-1") for line in lines])
+            else:
+                widths = infer_widths(lines)
+            data = itertools.chain(sample, data)
+        if widths is not None:
+            splitter = fixedsplitter(widths, strip)
+        else:
+            limit = split_limit([*indexes, *(where or [])])
+            splitter = linesplitter(
+                False, False, delimiter, nullable, strip, limit, binary
+            )
+        newline = b"\n" if binary else "\n"
+        records = _text_records(data, splitter, first_lineno, newline, numbered)
+
+    test = row_filter(where)
+    project = projector(indexes)
+    for lineno, line, cols in records:
+        if test is not None and not test(cols):
+            continue
+        result = project(cols)
+        if result is None:
+            if strict:
+                if binary:
+                    line = line.decode(errors="backslashreplace")
                 raise UcolException(
                     f"line={lineno}:'{line}' does not have enough columns"
-                ) from None
-        if result is not None:
-            yield result
+                )
+            continue
+        yield result
+
+
+def _chunk_ranges(
+    file: typing.BinaryIO, chunk_size: int
+) -> typing.Iterator[tuple[int, int]]:
+    """Yield (start, end) byte ranges of about chunk_size that end on a newline."""
+    size = os.fstat(file.fileno()).st_size
+    start = 0
+    while start < size:
+        end = start + chunk_size
+        if end < size:
+            file.seek(end)
+            file.readline()
+            end = file.tell()
+        yield start, min(end, size)
+        start = end
+
+
+def _read_chunk(
+    path: str, start: int, end: int, encoding: str | None, binary: bool = False
+) -> list[str] | list[bytes]:
+    """Return the lines in bytes start:end of path."""
+    with open(path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+    if binary:
+        return io.BytesIO(data).readlines()
+    return list(io.TextIOWrapper(io.BytesIO(data), encoding=encoding))
+
+
+def _split_chunk(
+    path: str, start: int, end: int, encoding: str | None, options: dict
+) -> tuple[list[list[str]] | None, int]:
+    """Split the lines in bytes start:end of path (run in a worker process).
+
+    Return (rows, number of lines); rows is None if split raised an error.
+    """
+    lines = _read_chunk(path, start, end, encoding, options["binary"])
+    try:
+        rows = list(split(lines, **options))
+    except UcolException:
+        rows = None
+    return rows, len(lines)
+
+
+def split_parallel(  # pylint: disable=too-many-arguments,too-many-locals
+    path: str,
+    indexes: list[ColumnSelector],
+    delimiter: str | None = None,
+    nullable: bool = False,
+    strip: bool = True,
+    strict: bool = False,
+    *,
+    jobs: int = 2,
+    encoding: str | None = None,
+    chunk_size: int = 1 << 22,
+    binary: bool = False,
+    widths: list[tuple[int, int | None]] | None = None,
+    where: list[ColumnFilter] | None = None,
+) -> typing.Iterator[list[str]]:
+    """Split a regular file into columns using a pool of worker processes.
+
+    The file is cut into chunks of about chunk_size bytes that end on a
+    newline, each chunk is passed to split() in a worker process, and the
+    rows are yielded in file order. At most 2 * jobs chunks are in flight.
+    A chunk that fails (--strict) is split again in this process with the
+    correct starting line number, so the error is the same as split().
+
+    path - name of the file
+    jobs - number of worker processes
+    encoding - text encoding of the file (default=locale encoding)
+    binary - if True, split bytes instead of text (see split)
+    widths - fixed-width column offsets (see split; "auto" is not supported)
+    where - list of ColumnFilters (see split)
+    see split for the other arguments
+    """
+    options = {
+        "indexes": indexes,
+        "delimiter": delimiter,
+        "nullable": nullable,
+        "strip": strip,
+        "strict": strict,
+        "binary": binary,
+        "widths": widths,
+        "where": where,
+    }
+    pool = concurrent.futures.ProcessPoolExecutor(jobs)
+    try:
+        with open(path, "rb") as file:
+            ranges = _chunk_ranges(file, chunk_size)
+            pending = collections.deque()
+
+            def submit(count):
+                for start, end in itertools.islice(ranges, count):
+                    future = pool.submit(
+                        _split_chunk, path, start, end, encoding, options
+                    )
+                    pending.append((start, end, future))
+
+            submit(2 * jobs)
+            lineno = 1
+            while pending:
+                start, end, future = pending.popleft()
+                submit(1)
+                rows, count = future.result()
+                if rows is None:
+                    # split again here so the error has the right line number
+                    lines = _read_chunk(path, start, end, encoding, binary)
+                    rows = split(lines, **options, first_lineno=lineno)
+                yield from rows
+                lineno += count
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _mapped_blocks(
+    file: typing.IO, block_size: int, binary: bool
+) -> typing.Iterator[list[str] | list[bytes]]:
+    """Yield lists of lines from blocks of a memory map of file."""
+    size = os.fstat(file.fileno()).st_size
+    if not size:
+        return
+    encoding = getattr(file, "encoding", None) or locale.getpreferredencoding(False)
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        start = 0
+        while start < size:
+            end = buf.find(b"\n", min(start + block_size, size) - 1)
+            end = size if end < 0 else end + 1
+            if binary:
+                lines = buf[start:end].split(b"\n")
+            else:
+                text = buf[start:end].decode(encoding)
+                if "\r" in text:
+                    text = text.replace("\r\n", "\n").replace("\r", "\n")
+                lines = text.split("\n")
+            if not lines[-1]:
+                lines.pop()
+            yield lines
+            start = end
+
+
+def mapped_lines(
+    file: typing.IO, block_size: int = 1 << 18, binary: bool = False
+) -> typing.Iterator[str] | typing.Iterator[bytes]:
+    """Return an iterator over the lines of a regular file using mmap.
+
+    The file is memory mapped and decoded a block (ending on a newline) at a
+    time instead of being read through the file object. Lines are returned
+    without line endings; as in text mode, a line ends with a newline, a
+    carriage return or both.
+
+    If binary is True, lines are bytes, split on newline only, and are not
+    decoded.
+    """
+    return itertools.chain.from_iterable(_mapped_blocks(file, block_size, binary))
+
+
+def _skip_records(
+    rows: typing.Iterator[list[str]], count: int
+) -> typing.Iterator[list[str]]:
+    """Yield the header row of rows, then the rows after the next count."""
+    header = next(rows, None)
+    if header is None:
+        return
+    yield header
+    yield from itertools.islice(rows, count, None)
+
+
+def _open_unit(rng: random.Random) -> float:
+    """Return a random float in the open interval (0, 1)."""
+    value = rng.random()
+    while not value:
+        value = rng.random()
+    return value
+
+
+def reservoir_sample(
+    lines: typing.Iterable[str], count: int, rng: random.Random
+) -> typing.Iterator[str]:
+    """Yield a uniform random sample of count lines, in input order.
+
+    Uses reservoir sampling with geometric skips (Algorithm L): the lines
+    between replacements are skipped without drawing a random number, or
+    doing anything else, for each of them.
+    """
+    lines = enumerate(lines)
+    reservoir = list(itertools.islice(lines, count))
+    if len(reservoir) == count:
+        weight = math.exp(math.log(_open_unit(rng)) / count)
+        while True:
+            skip = math.floor(math.log(_open_unit(rng)) / math.log1p(-weight))
+            item = next(itertools.islice(lines, skip, None), None)
+            if item is None:
+                break
+            reservoir[rng.randrange(count)] = item
+            weight *= math.exp(math.log(_open_unit(rng)) / count)
+    reservoir.sort(key=operator.itemgetter(0))
+    for _, line in reservoir:
+        yield line
+
+
+def bernoulli_sample(
+    lines: typing.Iterable[str], rate: float, rng: random.Random
+) -> typing.Iterator[str]:
+    """Yield each line with probability rate, in input order.
+
+    The number of lines skipped before each sampled line is drawn from a
+    geometric distribution, so unsampled lines are skipped without drawing a
+    random number for each of them.
+    """
+    lines = iter(lines)
+    if rate >= 1:
+        yield from lines
+        return
+    scale = math.log1p(-rate)
+    while True:
+        skip = math.floor(math.log(_open_unit(rng)) / scale)
+        line = next(itertools.islice(lines, skip, None), None)
+        if line is None:
+            return
+        yield line
+
+
+def seek_sample(
+    file: typing.IO, count: int, rng: random.Random, binary: bool = False
+) -> typing.Iterator[str] | typing.Iterator[bytes]:
+    """Yield up to count lines read at random offsets in a regular file.
+
+    Each offset is moved to the start of the next line, so only count lines
+    are read, wherever they are in the file. The sample is approximate: a
+    line's chance of being chosen grows with the length of the line before
+    it, and two offsets in the same line give it once. Lines are yielded in
+    file order, without line endings.
+    """
+    size = os.fstat(file.fileno()).st_size
+    if not size:
+        return
+    starts = set()
+    with open(file.fileno(), "rb", closefd=False) as raw:
+        for offset in sorted(rng.randrange(size) for _ in range(count)):
+            if offset:
+                raw.seek(offset - 1)
+                raw.readline()
+                offset = raw.tell()
+            else:
+                raw.seek(0)
+            if offset >= size or offset in starts:
+                continue
+            starts.add(offset)
+            line = raw.readline().rstrip(b"\r\n")
+            yield line if binary else line.decode(file.encoding)
+
+
+INDEX_STRIDE = 1000  # lines between the offsets kept in a line index
+INDEX_SUFFIX = ".ucolidx"
+_INDEX_MAGIC = b"UCOLIDX2"
+_INDEX_HEADER = struct.Struct("<8sIQQ16s16s")
+_INDEX_CHECK = 4096  # bytes at each end of the indexed part checked for a rewrite
+
+
+class LineIndex:
+    """Byte offsets of every stride'th line of a file, kept in a sidecar file.
+
+    offsets[i] is the offset of line i * stride (counting from 0). The index
+    covers the file up to size, the end of its last complete line, which has
+    lines lines; head and tail are digests of its first bytes and of the
+    bytes before size. If the file has only grown since, update scans just
+    the new part.
+    """
+
+    def __init__(self, stride: int = INDEX_STRIDE):
+        self.stride = stride
+        self.size = 0
+        self.lines = 0
+        self.head = b""
+        self.tail = b""
+        self.offsets = array.array("Q", [0])
+
+    @staticmethod
+    def _digest(file: typing.BinaryIO, start: int, stop: int) -> bytes:
+        file.seek(max(start, 0))
+        data = file.read(stop - max(start, 0))
+        return hashlib.blake2s(data, digest_size=16).digest()
+
+    @classmethod
+    def load(cls, path: str) -> "LineIndex | None":
+        """Return the index in sidecar file path, or None if there isn't one."""
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        if len(data) < _INDEX_HEADER.size:
+            return None
+        magic, stride, size, lines, head, tail = _INDEX_HEADER.unpack_from(data)
+        if magic != _INDEX_MAGIC:
+            return None
+        index = cls(stride)
+        index.size, index.lines = size, lines
+        index.head, index.tail = head, tail
+        index.offsets = array.array("Q")
+        index.offsets.frombytes(data[_INDEX_HEADER.size :])
+        if sys.byteorder == "big":
+            index.offsets.byteswap()
+        return index
+
+    def save(self, path: str) -> None:
+        """Write the index to sidecar file path (replacing it)."""
+        offsets = array.array("Q", self.offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        temp = f"{path}.tmp"
+        with open(temp, "wb") as file:
+            file.write(
+                _INDEX_HEADER.pack(
+                    _INDEX_MAGIC,
+                    self.stride,
+                    self.size,
+                    self.lines,
+                    self.head,
+                    self.tail,
+                )
+            )
+            file.write(offsets.tobytes())
+        os.replace(temp, path)
+
+    def valid(self, file: typing.BinaryIO) -> bool:
+        """Return True if file still starts with the part the index covers.
+
+        The part's first and last bytes are checked, and it must still end
+        with a newline.
+        """
+        size = os.fstat(file.fileno()).st_size
+        if size < self.size:
+            return False
+        if self.size:
+            file.seek(self.size - 1)
+            if file.read(1) != b"\n":
+                return False
+        return (
+            self._digest(file, 0, min(self.size, _INDEX_CHECK)) == self.head
+            and self._digest(file, self.size - _INDEX_CHECK, self.size) == self.tail
+        )
+
+    def update(self, file: typing.BinaryIO, block_size: int = 1 << 20) -> None:
+        """Index the complete lines of file after size.
+
+        Newlines are counted a segment at a time; only a segment holding the
+        start of an indexed line is searched newline by newline.
+        """
+        segment = 4096
+        lines = self.lines
+        target = (lines // self.stride + 1) * self.stride
+        end = self.size
+        file.seek(end)
+        while block := file.read(block_size):
+            for start in range(0, len(block), segment):
+                stop = start + segment
+                count = block.count(b"\n", start, stop)
+                if lines + count < target:
+                    lines += count
+                    if count:
+                        end = self.size + block.rindex(b"\n", start, stop) + 1
+                    continue
+                position = start
+                while (position := block.find(b"\n", position, stop) + 1) > 0:
+                    lines += 1
+                    end = self.size + position
+                    if lines == target:
+                        self.offsets.append(end)
+                        target += self.stride
+            self.size += len(block)
+        self.size = end
+        self.lines = lines
+        self.head = self._digest(file, 0, min(end, _INDEX_CHECK))
+        self.tail = self._digest(file, end - _INDEX_CHECK, end)
+
+    def seek(self, file: typing.BinaryIO, line: int) -> int:
+        """Seek file to the indexed line at or before line (counting from 0).
+
+        Returns the number of the line the file is at. If the indexed line
+        doesn't follow a newline, the file has been rewritten, and it is
+        seeked to the top (line 0) instead.
+        """
+        entry = min(line // self.stride, len(self.offsets) - 1)
+        offset = self.offsets[entry]
+        file.seek(max(offset - 1, 0))
+        if offset and file.read(1) != b"\n":
+            file.seek(0)
+            return 0
+        return entry * self.stride
+
+
+def build_index(path: str, stride: int = INDEX_STRIDE) -> LineIndex:
+    """Create or update the sidecar line index for the file at path.
+
+    An existing index is extended if the file has only grown since it was
+    written, and rebuilt otherwise.
+    """
+    index = LineIndex.load(path + INDEX_SUFFIX)
+    with open(path, "rb") as file:
+        if index is None or index.stride != stride or not index.valid(file):
+            index = LineIndex(stride)
+        index.update(file)
+    index.save(path + INDEX_SUFFIX)
+    return index
+
+
+def line_range(
+    file: typing.IO, first: int, last: int | None, binary: bool = False
+) -> typing.Iterator[str] | typing.Iterator[bytes]:
+    """Yield lines first through last (counting from 1) of a regular file.
+
+    If last is None, lines are yielded to the end of the file.
+
+    If the file has a valid sidecar index (see build_index), reading starts
+    at the indexed line nearest before first instead of at the top.
+    """
+    with open(file.fileno(), "rb", closefd=False) as raw:
+        line = 0
+        index = LineIndex.load(file.name + INDEX_SUFFIX)
+        if index is not None and index.valid(raw):
+            line = index.seek(raw, first - 1)
+        else:
+            raw.seek(0)
+        lines = raw if binary else io.TextIOWrapper(raw, file.encoding)
+        try:
+            stop = None if last is None else last - line
+            yield from itertools.islice(lines, first - 1 - line, stop)
+        finally:
+            if not binary:
+                lines.detach()
+
+
+# approximate memory used by each digest in the set of seen rows
+DIGEST_MEMORY = 100
+SPILL_PARTITIONS = 16
+
+
+def _row_digest(row: list[str] | list[bytes]) -> bytes:
+    """Return a 16 byte digest of row.
+
+    The columns are joined by NUL; a row the join would make ambiguous (one
+    with a NUL in a column, or no columns) is digested by its repr instead.
+    """
+    if row and isinstance(row[0], bytes):
+        data = b"\0".join(row)
+    else:
+        data = "\0".join(row).encode("utf-8", "surrogateescape")
+    if data.count(b"\0") >= len(row):
+        data = repr(row).encode("utf-8", "surrogateescape")
+        return hashlib.blake2s(data, digest_size=16, person=b"repr").digest()
+    return hashlib.blake2s(data, digest_size=16).digest()
+
+
+def _spilled(file: typing.BinaryIO) -> typing.Iterator[tuple]:
+    """Yield the records pickled to file, then close it."""
+    with file:
+        file.seek(0)
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+def _unique_records(
+    records: typing.Iterable[tuple],
+    limit: int | None,
+    depth: int = 0,
+    seen: set | None = None,
+) -> typing.Iterator[tuple]:
+    """Yield the first (seq, digest, row) record for each digest, in seq order.
+
+    Once limit digests are held in seen, records with new digests are spilled
+    to temp files partitioned on the depth'th byte of the digest; each
+    partition is then reduced in turn (spilling again, on the next byte, if
+    needed) and the partitions are merged by seq.
+    """
+    if seen is None:
+        seen = set()
+    spill = None
+    for record in records:
+        digest = record[1]
+        if digest in seen:
+            continue
+        if spill is None and (limit is None or len(seen) < limit):
+            seen.add(digest)
+            yield record
+            continue
+        if spill is None:
+            # each spill file is closed by _spilled once read back
+            spill = [
+                tempfile.TemporaryFile()  # noqa: SIM115
+                for _ in range(SPILL_PARTITIONS)
+            ]
+        pickle.dump(record, spill[digest[depth % len(digest)] % SPILL_PARTITIONS])
+    if spill is None:
+        return
+    seen.clear()
+    reduced = []
+    for file in spill:
+        out = tempfile.TemporaryFile()  # noqa: SIM115
+        for record in _unique_records(_spilled(file), limit, depth + 1):
+            pickle.dump(record, out)
+        reduced.append(out)
+    yield from heapq.merge(*(_spilled(out) for out in reduced))
+
+
+def unique(
+    rows: typing.Iterator[list[str]],
+    max_memory: int | None = None,
+    header: bool = False,
+) -> typing.Iterator[list[str]]:
+    """Yield the first occurrence of each row of rows, in order.
+
+    Rows are remembered by a fixed-size digest rather than their text. If
+    max_memory (bytes) is given, the digests are kept to about that size and
+    rows with new digests after that are spilled to temp files, to be output
+    once rows is exhausted.
+
+    If header is True, the first row is passed through without being counted.
+    """
+    if header:
+        first = next(rows, None)
+        if first is None:
+            return
+        yield first
+    limit = None
+    if max_memory is not None:
+        limit = max(max_memory // DIGEST_MEMORY, 1)
+    seen = set()
+    rows = enumerate(rows)
+    for seq, row in rows:
+        digest = _row_digest(row)
+        if digest in seen:
+            continue
+        if limit is not None and len(seen) >= limit:
+            # full: continue with spilling from this row on
+            records = itertools.chain(
+                [(seq, digest, row)],
+                ((seq, _row_digest(row), row) for seq, row in rows),
+            )
+            for _, _, row in _unique_records(records, limit, seen=seen):
+                yield row
+            return
+        seen.add(digest)
+        yield row
+
+
+def _regular_file(file: typing.IO) -> bool:
+    """Return True if file is open on a regular file."""
+    try:
+        return stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
+def width_specifier(spec: str) -> list[tuple[int, int]] | str:
+    """Return fixed-width column offsets for spec.
+
+    spec is a comma separated list of column widths (text after the last
+    column is ignored), or "auto" to infer the columns from the input.
+    """
+    if spec == "auto":
+        return spec
+    try:
+        widths = [int(width) for width in spec.split(",")]
+    except ValueError:
+        widths = []
+    if not widths or min(widths) < 1:
+        raise argparse.ArgumentTypeError(f"Invalid column widths: {spec}")
+    offsets = []
+    start = 0
+    for width in widths:
+        offsets.append((start, start + width))
+        start += width
+    return offsets
+
+
+def where_specifier(spec: str) -> ColumnFilter:
+    """Return a ColumnFilter for spec.
+
+    spec is a column number (as in column_specifier, starting with one; a
+    minus (-) or underscore (_) counts from the right), an operator and a
+    value, e.g. 3>100, 2==GET, _1~^err, 4 in a,b,c (see ColumnFilter).
+    """
+    if match := re.match(
+        r"\s*([-_]?\d+)\s*(==|!=|<=|>=|!~|not in|=|<|>|~|in)\s*(.*)$", spec
+    ):
+        column, op, value = match.groups()
+        try:
+            return ColumnFilter(column, op, value)
+        except re.error as err:
+            raise argparse.ArgumentTypeError(
+                f"Invalid regex in filter: {spec}: {err}"
+            ) from None
+    raise argparse.ArgumentTypeError(f"Invalid filter: {spec}")
+
+
+def column_numbers(spec: str) -> list[int]:
+    """Return the list of positive column numbers in comma separated spec."""
+    try:
+        columns = [int(column) for column in spec.split(",")]
+    except ValueError:
+        columns = []
+    if not columns or min(columns) < 1:
+        raise argparse.ArgumentTypeError(f"Invalid column numbers: {spec}")
+    return columns
+
+
+def lines_specifier(spec: str) -> tuple[int, int | None]:
+    """Return (first, last) for spec, a line number range like 5-10, 5- or 5.
+
+    Lines count from 1 and the range includes last; last is None for 5-.
+    """
+    match = re.match(r"(\d+)(?:(-)(\d*))?$", spec)
+    if match:
+        first, dash, last = match.groups()
+        first = int(first)
+        last = int(last) if last else (None if dash else first)
+        if first >= 1 and (last is None or last >= first):
+            return first, last
+    raise argparse.ArgumentTypeError(f"Invalid line range: {spec}")
+
+
+def memory_size(spec: str) -> int:
+    """Return the number of bytes in spec, a number with an optional K, M or G."""
+    match = re.match(r"(\d+)([KMG]?)$", spec.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid memory size: {spec}")
+    number, unit = match.groups()
+    return int(number) << (10 * " KMG".index(unit or " "))
 
 
 def column_specifier(column: str):
@@ -345,6 +1675,9 @@ def column_specifier(column: str):
 
       if specifying a negative column number and a [n,m] selector, then an underscore
       (_) must be used instead of a minus sign (-) as a prefix to the column number.
+    * otherwise, column is a path into nested JSON (--json only): dict keys
+      separated by dots, each optionally followed by [n] list indexes, e.g.
+      req.status or items[0].sku
     """
 
     if re.match(r"[-_]?\d+$", column):
@@ -357,9 +1690,131 @@ def column_specifier(column: str):
     if match := re.match(r"(_?\d+)\[(-?\d*)(?:,(-?\d+))?\]$", column):
         index, start, end = match.groups()
         return ColumnSelectorSlice(index, start, end)
+    if _PATH_SPEC.match(column):
+        return ColumnSelectorPath(column)
     raise argparse.ArgumentTypeError(f"Invalid column specification: {column}")
 
 
+class Pipeline:  # pylint: disable=too-many-instance-attributes
+    """Reusable, in-process ucol: split lines into columns and select them.
+
+    columns - column specs as accepted by column_specifier (e.g. "1", "3+",
+              "2-4", "_1[,3]", or "req.status" with is_json), or
+              ColumnSelectors (default=all columns)
+    where - filter specs as accepted by where_specifier (e.g. "3>100"), or
+            ColumnFilters
+    widths - column widths as accepted by width_specifier (e.g. "5,10" or
+             "auto"), or offsets
+    un_comma - True to apply un_comma to every output column, or a list of
+               output column numbers to apply it to
+    unique, max_memory - output only the first occurrence of each row (see
+                         unique)
+    is_json, null_value, header_sample - split JSON records (see split_json)
+    the other options are as for split.
+
+    The specs are parsed once, when the Pipeline is created; calling it with
+    an iterable of lines (e.g. an open file) returns a lazy iterator of output
+    rows. Invalid specs or options raise UcolException.
+
+        pipeline = Pipeline(["3", "1"], delimiter=",", where=["2==GET"])
+        for row in pipeline(lines):
+            ...
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-locals
+        self,
+        columns: list[str | ColumnSelector] | None = None,
+        *,
+        delimiter: str | None = None,
+        nullable: bool = False,
+        strip: bool = True,
+        strict: bool = False,
+        is_csv: bool = False,
+        is_tsv: bool = False,
+        binary: bool = False,
+        widths: str | list[tuple[int, int | None]] | None = None,
+        where: list[str | ColumnFilter] | None = None,
+        un_comma: bool | list[int] = False,
+        unique: bool = False,
+        max_memory: int | None = None,
+        is_json: bool = False,
+        null_value: str = "",
+        header_sample: int | None = None,
+    ):
+        try:
+            self.indexes = [
+                column_specifier(c) if isinstance(c, str) else c
+                for c in columns or ["1+"]
+            ]
+            self.where = [
+                where_specifier(w) if isinstance(w, str) else w for w in where or []
+            ]
+            if isinstance(widths, str) and widths != "auto":
+                widths = width_specifier(widths)
+        except argparse.ArgumentTypeError as err:
+            raise UcolException(str(err)) from None
+        if widths and (is_csv or is_tsv or is_json):
+            raise UcolException("widths can't be used with csv, tsv or json")
+        if self.where and (is_json or binary):
+            raise UcolException("where can't be used with json or binary")
+        if binary and (is_csv or is_tsv or is_json or un_comma):
+            raise UcolException("binary can't be used with csv, tsv, json or un_comma")
+        if not is_json and any(
+            isinstance(index, ColumnSelectorPath) for index in self.indexes
+        ):
+            raise UcolException("JSON path columns are only used with is_json")
+        if header_sample is not None and header_sample < 1:
+            raise UcolException("header_sample must be at least 1")
+        self.delimiter = delimiter
+        self.nullable = nullable
+        self.strip = strip
+        self.strict = strict
+        self.is_csv = is_csv
+        self.is_tsv = is_tsv
+        self.binary = binary
+        self.widths = widths
+        self.un_comma = None
+        if un_comma:
+            self.un_comma = numeric.un_commaer(None if un_comma is True else un_comma)
+        self.unique = unique
+        self.max_memory = max_memory
+        self.is_json = is_json
+        self.null_value = null_value
+        self.header_sample = header_sample
+
+    def __call__(
+        self, lines: typing.Iterable[str] | typing.Iterable[bytes]
+    ) -> typing.Iterator[list[str]]:
+        """Return an iterator over the output rows for lines.
+
+        With is_json, lines is an open file or JSON string, and the first row
+        is the header.
+        """
+        if self.is_json:
+            rows = split_json(
+                lines, self.indexes, self.strict, self.null_value, self.header_sample
+            )
+        else:
+            rows = split(
+                lines,
+                self.indexes,
+                self.delimiter,
+                self.nullable,
+                self.strip,
+                self.strict,
+                self.is_csv,
+                self.is_tsv,
+                binary=self.binary,
+                widths=self.widths,
+                where=self.where,
+            )
+        if self.un_comma:
+            rows = map(self.un_comma, rows)
+        if self.unique:
+            rows = unique(rows, self.max_memory, self.is_json)
+        return rows
+
+
 def main():
     """Main handler."""
     parser = argparse.ArgumentParser(description="select columns from text")
@@ -390,11 +1845,57 @@ def main():
         action="store_true",
         help="parse input as JSON (list of dicts or sequence of dicts)",
     )
+    parser.add_argument(
+        "--header-sample",
+        type=int,
+        default=None,
+        metavar="N",
+        help="with --json, take column headers from the first N records and "
+        "stream the rest (default=all records)",
+    )
+    parser.add_argument(
+        "--widths",
+        "-w",
+        type=width_specifier,
+        default=None,
+        help="cut lines into fixed-width columns: comma separated widths, or "
+        f"'auto' to infer them from the first {WIDTH_SAMPLE} lines",
+    )
+    parser.add_argument(
+        "--where",
+        action="append",
+        type=where_specifier,
+        metavar="FILTER",
+        help="only output rows where FILTER is true, e.g. 3>100, 2==GET, "
+        "'1~^err', '4 in a,b' (operators: == != < <= > >= ~ !~ in, not in); "
+        "may be repeated",
+    )
     parser.add_argument(
         "--un-comma",
         action="store_true",
         help="remove commas and/or leading dollar sign ($) from numbers",
     )
+    parser.add_argument(
+        "--un-comma-columns",
+        type=column_numbers,
+        default=None,
+        metavar="N,M,...",
+        help="like --un-comma, but only for these output columns",
+    )
+    parser.add_argument(
+        "-u",
+        "--unique",
+        action="store_true",
+        help="output only the first occurrence of each output row",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=memory_size,
+        default=None,
+        metavar="SIZE",
+        help="with --unique, spill rows to temp files once the seen rows take "
+        "about SIZE bytes (e.g. 500M); default=no limit",
+    )
     parser.add_argument(
         "--to-json",
         action="store_true",
@@ -405,6 +1906,11 @@ def main():
         action="store_true",
         help="output as formatted json (enables --to-json)",
     )
+    parser.add_argument(
+        "--to-ndjson",
+        action="store_true",
+        help="output as json, one dict per line, using first row as keys",
+    )
     parser.add_argument(
         "--to-csv",
         nargs="?",
@@ -429,6 +1935,13 @@ def main():
         default="",
         help="string to substitute for JSON null values (default=empty string); only used with --json",
     )
+    parser.add_argument(
+        "--binary",
+        "-b",
+        action="store_true",
+        help="split and select bytes without decoding or encoding them; "
+        "not used with csv, tsv or json input or output, or --un-comma",
+    )
     parser.add_argument(
         "--null-columns",
         "-n",
@@ -446,6 +1959,72 @@ def main():
         action="store_true",
         help="raise error on rows that have too few columns (else skip)",
     )
+    parser.add_argument(
+        "--skip",
+        type=int,
+        default=0,
+        metavar="N",
+        help="skip the first N input lines (JSON records with --json) "
+        "without splitting them",
+    )
+    parser.add_argument(
+        "--lines",
+        type=lines_specifier,
+        default=None,
+        metavar="A-B",
+        help="only read lines A through B (or A-, to the end) of a regular "
+        "input file (-f), seeking to them with its --build-index index, if any",
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help=f"write (or extend) FILE{INDEX_SUFFIX}, the byte offsets of every "
+        f"{INDEX_STRIDE}th line of a regular input file (-f), and exit",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        metavar="M",
+        help="stop reading input after M rows are output "
+        "(not counting the --json header)",
+    )
+    sample_group = parser.add_mutually_exclusive_group()
+    sample_group.add_argument(
+        "--sample",
+        type=int,
+        default=None,
+        metavar="N",
+        help="output a uniform random sample of N input lines, in input order",
+    )
+    sample_group.add_argument(
+        "--sample-rate",
+        type=float,
+        default=None,
+        metavar="P",
+        help="output each input line with probability P",
+    )
+    parser.add_argument(
+        "--sample-fast",
+        action="store_true",
+        help="with --sample, read lines at N random offsets of a regular "
+        "input file (-f) instead of reading the whole file; the sample favors "
+        "lines that follow long lines",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="random seed for --sample and --sample-rate",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="split a regular input file (-f) with N worker processes "
+        "(default=1); not used with --csv, --tsv or --json",
+    )
     parser.add_argument(
         "columns",
         type=column_specifier,
@@ -455,33 +2034,194 @@ def main():
     parser.add_argument(
         "-f",
         "--file",
-        type=argparse.FileType("r"),
-        default=sys.stdin,
-        help="input file (default=stdin)",
+        nargs="+",
+        default=["-"],
+        metavar="FILE",
+        help="input files, may be gzip, bz2 or xz compressed; several files are "
+        "read as one input while the next files load in the background "
+        "(default=stdin)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="read several input files in the order they finish loading",
     )
     args = parser.parse_args()
+
+    def trailing_column(spec):
+        """Return the selector for spec; JSON paths must come before -f."""
+        column = column_specifier(spec)
+        if isinstance(column, ColumnSelectorPath):
+            raise TypeError(spec)
+        return column
+
+    args.file, columns = inputs.trailing_columns(args.file, trailing_column)
+    args.columns += columns
+    if not args.json and any(
+        isinstance(column, ColumnSelectorPath) for column in args.columns
+    ):
+        parser.error("JSON path columns (e.g. req.status) are only used with --json")
+    if len(args.file) == 1:
+        args.file = inputs.open_file(parser, args.file[0])
+    else:
+        inputs.check_paths(parser, args.file)
     if not args.columns:
         args.columns = [column_specifier("1+")]
     if args.to_sc:
         args.un_comma = True
     if args.pretty_json:
         args.to_json = True
-    json_rows = []
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.skip < 0 or (args.limit is not None and args.limit < 0):
+        parser.error("--skip and --limit can't be negative")
+    if args.widths and (args.csv or args.tsv or args.json):
+        parser.error("--widths can't be used with --csv, --tsv or --json")
+    if args.max_memory is not None and not args.unique:
+        parser.error("--max-memory is only used with --unique")
+    if args.header_sample is not None and args.header_sample < 1:
+        parser.error("--header-sample must be at least 1")
+    if args.sample is not None and args.sample < 1:
+        parser.error("--sample must be at least 1")
+    if args.sample_rate is not None and not 0 < args.sample_rate <= 1:
+        parser.error("--sample-rate must be more than 0 and at most 1")
+    sampling = args.sample is not None or args.sample_rate is not None
+    if sampling and (args.csv or args.tsv or args.json):
+        parser.error("--sample options can't be used with --csv, --tsv or --json")
+    # stdin redirected from a file may already be partly read, so it is
+    # never mapped, seeked or rewound
+    regular = (
+        not isinstance(args.file, list)
+        and args.file is not sys.stdin
+        and _regular_file(args.file)
+    )
+    if args.sample_fast and (args.sample is None or args.skip or not regular):
+        parser.error("--sample-fast needs --sample, no --skip and a regular -f file")
+    if args.sample_fast and args.strict:
+        # lines read at random offsets have no line numbers to report
+        parser.error("--sample-fast can't be used with --strict")
+    if args.build_index:
+        if not regular:
+            parser.error("--build-index needs a regular -f file")
+        build_index(args.file.name)
+        return
+    if args.lines and (
+        not regular or args.skip or sampling or args.csv or args.tsv or args.json
+    ):
+        parser.error(
+            "--lines needs a regular -f file, and no --skip, --sample, "
+            "--csv, --tsv or --json"
+        )
+    if args.where and (args.json or args.binary):
+        parser.error("--where can't be used with --json or --binary")
+    if args.binary:
+        conflicts = [
+            name
+            for name, value in (
+                ("--csv", args.csv),
+                ("--tsv", args.tsv),
+                ("--json", args.json),
+                ("--un-comma", args.un_comma),
+                ("--un-comma-columns", args.un_comma_columns),
+                ("--to-json", args.to_json),
+                ("--to-ndjson", args.to_ndjson),
+                ("--to-csv", args.to_csv is not None),
+                ("--to-tsv", args.to_tsv is not None),
+                ("--to-sc", args.to_sc),
+            )
+            if value
+        ]
+        if conflicts:
+            parser.error(f"--binary can't be used with {', '.join(conflicts)}")
+    # a terminal (line buffered stdout), or unbuffered stdout (python -u), gets
+    # each row as soon as it is split, e.g. from tail -f; elsewhere rows are
+    # written in blocks
+    eager = any(
+        getattr(sys.stdout, name, False) for name in ("line_buffering", "write_through")
+    )
+    out = OutputBuffer(
+        sys.stdout.buffer if args.binary else sys.stdout,
+        args.binary,
+        1 if eager else 1 << 16,
+    )
+    json_writer = None
     json_keys = None
     csv_writer = None
-    if args.to_csv is not None:
-        csv_writer = csv.writer(sys.stdout, lineterminator="\n")
+    if args.to_json or args.to_ndjson:
+        json_writer = JsonWriter(out, 2 if args.pretty_json else None, args.to_ndjson)
+    elif args.to_csv is not None:
+        csv_writer = csv.writer(out, lineterminator="\n")
         if args.to_csv:
             csv_writer.writerow(args.to_csv.split(","))
     elif args.to_tsv is not None:
-        csv_writer = csv.writer(sys.stdout, dialect="excel-tab", lineterminator="\n")
+        csv_writer = csv.writer(out, dialect="excel-tab", lineterminator="\n")
         if args.to_tsv:
             csv_writer.writerow(args.to_tsv.split("\t"))
+    limit = args.limit
+    if limit is not None and (args.json or json_writer):
+        limit += 1  # the header row, or the first row used as JSON keys
+    files = None
+    if isinstance(args.file, list):
+        files = inputs.open_files(args.file, args.binary, not args.unordered)
     if args.json:
-        rows = split_json(args.file.read(), args.columns, args.strict, args.null_value)
+        if files:
+            rows = _split_json_files(
+                files, args.columns, args.strict, args.null_value, args.header_sample
+            )
+        else:
+            rows = split_json(
+                args.file,
+                args.columns,
+                args.strict,
+                args.null_value,
+                args.header_sample,
+            )
+        if args.skip:
+            rows = _skip_records(rows, args.skip)
+    elif (
+        not files
+        and args.jobs > 1
+        and not (args.csv or args.tsv or args.skip or args.widths == "auto")
+        and not (sampling or args.lines)
+        and regular
+    ):
+        rows = split_parallel(
+            args.file.name,
+            args.columns,
+            args.delimiter,
+            args.null_columns,
+            not args.no_strip,
+            args.strict,
+            jobs=args.jobs,
+            encoding=args.file.encoding,
+            binary=args.binary,
+            widths=args.widths,
+            where=args.where,
+        )
     else:
+        if files:
+            source = itertools.chain.from_iterable(files)
+        elif args.binary:
+            source = args.file.buffer
+        else:
+            source = args.file
+        if regular and not (args.csv or args.tsv):
+            source = mapped_lines(args.file, binary=args.binary)
+        if args.skip:
+            source = itertools.islice(source, args.skip, None)
+        rng = random.Random(args.seed)
+        if args.lines:
+            source = line_range(args.file, *args.lines, args.binary)
+        elif args.sample_fast:
+            source = seek_sample(args.file, args.sample, rng, args.binary)
+        elif args.sample is not None:
+            source = enumerate(source, args.skip + 1)
+            source = reservoir_sample(source, args.sample, rng)
+        elif args.sample_rate is not None:
+            source = enumerate(source, args.skip + 1)
+            source = bernoulli_sample(source, args.sample_rate, rng)
         rows = split(
-            args.file.read(),
+            source,
             args.columns,
             args.delimiter,
             args.null_columns,
@@ -489,25 +2229,57 @@ def main():
             args.strict,
             args.csv,
             args.tsv,
+            first_lineno=args.lines[0] if args.lines else args.skip + 1,
+            binary=args.binary,
+            widths=args.widths,
+            where=args.where,
+            numbered=sampling and not args.sample_fast,
         )
-    for row_number, response in enumerate(rows):
-        if args.un_comma:
-            response = [remove_comma(item) for item in response]
-        if args.to_json:
-            if row_number == 0:
-                json_keys = response
+    un_comma = None
+    if args.un_comma:
+        un_comma = numeric.un_commaer()
+    elif args.un_comma_columns:
+        un_comma = numeric.un_commaer(args.un_comma_columns)
+    if un_comma:
+        rows = (un_comma(row) for row in rows)
+    if args.unique:
+        rows = unique(rows, args.max_memory, bool(args.json or json_writer))
+    output_delimiter = args.output_delimiter
+    newline = "\n"
+    if args.binary:
+        output_delimiter = os.fsencode(output_delimiter)
+        newline = b"\n"
+    try:
+        for row_number, response in enumerate(itertools.islice(rows, limit)):
+            if json_writer:
+                if row_number == 0:
+                    json_keys = response
+                else:
+                    json_writer.write(dict(zip(json_keys, response, strict=False)))
+            elif args.to_sc:
+                for sc_line in row_to_sc(response, row_number):
+                    out.write(sc_line + newline)
+            elif csv_writer:
+                csv_writer.writerow(response)
             else:
-                json_rows.append(dict(zip(json_keys, response, strict=False)))
-        elif args.to_sc:
-            for sc_line in row_to_sc(response, row_number):
-                print(sc_line)
-        elif csv_writer:
-            csv_writer.writerow(response)
-        else:
-            print(args.output_delimiter.join(response))
-    if args.to_json:
-        indent = 2 if args.pretty_json else None
-        print(json.dumps(json_rows, indent=indent))
+                out.write(output_delimiter.join(response) + newline)
+        if json_writer:
+            json_writer.close()
+        out.flush()
+    except BrokenPipeError:
+        # output was closed (e.g. piped to head): stop reading and exit quietly,
+        # pointing stdout at devnull so the interpreter's final flush succeeds
+        rows.close()
+        if files:
+            files.close()
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    except Exception:
+        # write the rows before the error (e.g. a --strict error) first
+        with contextlib.suppress(BrokenPipeError):
+            out.flush()
+        raise
 
 
 if __name__ == "__main__":
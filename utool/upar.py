@@ -4,6 +4,8 @@ import argparse
 import re
 import sys
 
+from utool import inputs
+
 
 def get_indent(indent, lines):
     """derive indent from first non-empty line"""
@@ -110,9 +112,9 @@ def main():
     parser.add_argument(
         "-f",
         "--file",
-        type=argparse.FileType("r"),
+        type=inputs.input_file,
         default=sys.stdin,
-        help="input file (default: stdin)",
+        help="input file, may be gzip, bz2 or xz compressed (default: stdin)",
     )
     args = parser.parse_args()
     for text in paragraph(
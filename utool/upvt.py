@@ -7,6 +7,8 @@ import sys
 from collections import OrderedDict
 from decimal import Decimal, InvalidOperation
 
+from utool import inputs
+
 
 def parse_sort_suffix(arg: str) -> tuple[str, str | None]:
     """Parse an argument, stripping optional +/- sort suffix.
@@ -279,9 +281,9 @@ def main() -> None:
     parser.add_argument(
         "-f",
         "--file",
-        type=argparse.FileType("r"),
+        type=inputs.input_file,
         default=sys.stdin,
-        help="input file (default=stdin)",
+        help="input file, may be gzip, bz2 or xz compressed (default=stdin)",
     )
     parser.add_argument(
         "-o",
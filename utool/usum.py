@@ -2,8 +2,10 @@
 
 import argparse
 import collections
+import itertools
 import sys
-import re
+
+from utool import inputs, numeric
 
 
 class UsumException(Exception):
@@ -19,8 +21,7 @@ def num(value, strict: bool) -> tuple[int | float, int]:
     returns (numeric value, precision)
     """
     if not strict:
-        if re.match(r"-?(\$\d*|\$?\d{1,3}(,\d{3})+)(\.\d+)?$", value):
-            value = value.replace("$", "").replace(",", "")
+        value = numeric.un_comma(value)
     precision = 0
     try:
         value_float = float(value)
@@ -172,9 +173,17 @@ def main():
     parser.add_argument(
         "-f",
         "--file",
-        type=argparse.FileType("r"),
-        default=sys.stdin,
-        help="input file (default=stdin)",
+        nargs="+",
+        default=["-"],
+        metavar="FILE",
+        help="input files, may be gzip, bz2 or xz compressed; several files are "
+        "read as one input while the next files load in the background "
+        "(default=stdin)",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="read several input files in the order they finish loading",
     )
     op_group = parser.add_mutually_exclusive_group()
     op_group.add_argument(
@@ -200,12 +209,21 @@ def main():
     )
 
     args = parser.parse_args()
+    args.file, groupby = inputs.trailing_columns(args.file, int)
+    args.groupby += groupby
+    if len(args.file) == 1:
+        data = inputs.open_file(parser, args.file[0])
+    else:
+        inputs.check_paths(parser, args.file)
+        data = itertools.chain.from_iterable(
+            inputs.open_files(args.file, ordered=not args.unordered)
+        )
     op = args.op or "sum"
     if args.groupby:
         if len(args.groupby) == 1 and args.groupby[0] == 0:
             args.groupby = []
         groups = group_by(
-            args.file, args.groupby, args.delimiter, args.strict, args.count, op
+            data, args.groupby, args.delimiter, args.strict, args.count, op
         )
         if args.groupby:
             for key, val in groups.items():
@@ -215,7 +233,7 @@ def main():
             _, val = next(iter(groups.items()))
             sys.stdout.write(args.delimiter.join(n for n in val) + "\n")
     else:
-        result = agg_all(args.file, args.delimiter, args.strict, op)
+        result = agg_all(data, args.delimiter, args.strict, op)
         sys.stdout.write(result + "\n")
 
 
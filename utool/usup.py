@@ -5,6 +5,8 @@ import csv
 import io
 import sys
 
+from utool import inputs
+
 
 def parse_spec(spec: str) -> tuple[str, list[str]]:
     """Parse a suppress spec like 'column:key1,key2' into (column, [keys]).
@@ -128,9 +130,9 @@ def main() -> None:
     parser.add_argument(
         "-f",
         "--file",
-        type=argparse.FileType("r"),
+        type=inputs.input_file,
         default=sys.stdin,
-        help="input file (default=stdin)",
+        help="input file, may be gzip, bz2 or xz compressed (default=stdin)",
     )
     parser.add_argument(
         "-o",